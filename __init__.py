@@ -7,5 +7,6 @@ from .config_reader import *
 from .raycodes import *
 from .utils import usd_to_lamports, lamports_to_tokens, usd_to_microlamports
 from .swaps import *
+from .subscriptions import AccountSubscriptionPool
 
-__all__ = ["DexBetterLogs", "Interpreters", "Market", "cc", "ColorCodes", "RaydiumLogParser", "usd_to_lamports", "lamports_to_tokens", "usd_to_microlamports"]
\ No newline at end of file
+__all__ = ["DexBetterLogs", "Interpreters", "Market", "cc", "ColorCodes", "RaydiumLogParser", "usd_to_lamports", "lamports_to_tokens", "usd_to_microlamports", "AccountSubscriptionPool"]
\ No newline at end of file
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    from .common_ import *
+    from .colors import *
+except ImportError:
+    from common_ import *
+    from colors import *
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    LRU cache whose entries also expire after `ttl` seconds.
+    Expiry uses wall-clock time so persisted entries stay valid across restarts.
+    Supports the dict subset used around the bot (`in`, `[]`, `get`).
+    """
+
+    def __init__(self, name, maxsize, ttl):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()  # {key: (value, expires_at)}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        if entry[1] < time.time():
+            del self.entries[key]
+            self.misses += 1
+            return default
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key, value, ttl=None):
+        self.entries[key] = (value, time.time() + (ttl or self.ttl))
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def __contains__(self, key):
+        entry = self.entries.get(key)
+        return entry is not None and entry[1] >= time.time()
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def snapshot(self):
+        """Shallow copy of the entries, cheap enough to take on the event loop."""
+        return list(self.entries.items())
+
+    @staticmethod
+    def dump(items):
+        """Serializable rows of the unexpired entries of a snapshot."""
+        now = time.time()
+        return [[key, value, expires_at] for key, (value, expires_at) in items if expires_at >= now]
+
+    def restore(self, rows):
+        now = time.time()
+        for key, value, expires_at in rows:
+            if expires_at >= now:
+                self.entries[key] = (value, expires_at)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class MetadataCache:
+    """
+    Typed caches for data that does not change during a session:
+    transactions by signature, mint supply/decimals and creator by mint.
+    When `path` is set the caches are saved there and reloaded on start;
+    `autosave` takes a snapshot on the event loop and leaves the JSON
+    encoding and the file write to a thread.
+    """
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self.transactions = TTLCache("transactions", CACHE_TX_SIZE, CACHE_TX_TTL)
+        self.supply = TTLCache("supply", CACHE_MINT_SIZE, CACHE_MINT_TTL)        # {mint: {"amount": int, "decimals": int}}
+        self.decimals = TTLCache("decimals", CACHE_MINT_SIZE, CACHE_MINT_TTL)    # {mint: int}
+        self.creators = TTLCache("creators", CACHE_MINT_SIZE, CACHE_MINT_TTL)    # {mint: owner}
+
+    @property
+    def caches(self):
+        return (self.transactions, self.supply, self.decimals, self.creators)
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for cache in self.caches:
+                cache.restore(data.get(cache.name, []))
+            logging.info(f"Loaded cache from {self.path}: " + ", ".join(f"{cache.name}={len(cache)}" for cache in self.caches))
+        except Exception as e:
+            logging.error(f"Error loading cache: {e}")
+
+    def snapshot(self):
+        return {cache.name: cache.snapshot() for cache in self.caches}
+
+    def write(self, snapshot):
+        """Encode a snapshot and atomically replace the cache file with it; safe to run off the event loop."""
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.{threading.get_ident()}.tmp"  # A shutdown save may overlap an autosave
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({name: TTLCache.dump(items) for name, items in snapshot.items()}, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logging.error(f"Error saving cache: {e}")
+
+    def save(self):
+        """Save synchronously, for shutdown."""
+        if self.path:
+            self.write(self.snapshot())
+
+    async def save_async(self):
+        if self.path:
+            await asyncio.to_thread(self.write, self.snapshot())
+
+    def stats(self):
+        return {cache.name: cache.stats() for cache in self.caches}
+
+    async def autosave(self, stop_event, interval=CACHE_SAVE_INTERVAL):
+        """Periodically persist the caches and log their hit rates."""
+        while not stop_event.is_set():
+            await asyncio.sleep(interval)
+            await self.save_async()
+            logging.info(
+                f"{cc.LIGHT_GRAY}Cache: " + " ".join(
+                    f"{name}={s['size']} ({s['hit_rate']:.0%} hit)" for name, s in self.stats().items()
+                ) + cc.RESET
+            )
@@ -20,4 +20,108 @@ PUMP_MIGRATION = "39azUYFWPz3VHgKCf3VChUwbpURdCHRxjWVowf5jUJjg"
 RLQ4 = "675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8"
 RCLMM = "CAMMCzo5YL8w4VFF8KVHrK22GGUsp5VTaW7grrKgrWqK"
 RPLMM = "CPMMoo8L3F4NbTegBCKVNunggL7H1ZpdTHKxQB5qKP1C"
-QN_WS = "wss://jupiter-swap-api.quiknode.pro/B6D3B800F1E3/ws"
\ No newline at end of file
+QN_WS = "wss://jupiter-swap-api.quiknode.pro/B6D3B800F1E3/ws"
+
+# Account subscriptions are multiplexed over this many shared websockets
+ACCOUNT_WS_CONNECTIONS = 4
+# accountSubscribe attempts before an address is given up, the backoff between them (s),
+# and requests awaiting their confirmation at once per connection
+SUBSCRIBE_ATTEMPTS = 6
+SUBSCRIBE_BASE_DELAY = 0.25
+SUBSCRIBE_MAX_DELAY = 8.0
+SUBSCRIBE_CONCURRENCY = 32
+
+# Programs whose logs are ingested together, and how many signatures are kept for de-duplication
+LOG_PROGRAMS = [RLQ4, RCLMM, RPLMM, PUMP_MIGRATION]
+LOG_DEDUP_SIZE = 50_000
+
+# Concurrent log consumers, cap on in-flight RPC lookups and how often pipeline stats are logged (s)
+LOG_WORKERS = 8
+MAX_INFLIGHT_RPC = 16
+LOG_STATS_INTERVAL = 30
+
+# Ingestion queue bound, overflow policy ("drop-oldest", "drop-newest" or "block") and expiry by age (s) or slots
+LOG_QUEUE_SIZE = 5_000
+LOG_QUEUE_POLICY = "drop-oldest"
+LOG_MAX_AGE = 20.0
+LOG_MAX_SLOT_AGE = 50
+
+# Gap backfill after a logs reconnect: signatures per page, page cap per program, concurrent getTransaction calls,
+# getTransaction cap per gap (newest first) and recent frames kept to find each program's last signature
+BACKFILL_PAGE_SIZE = 1000
+BACKFILL_MAX_PAGES = 10
+BACKFILL_CONCURRENCY = 8
+BACKFILL_MAX_TX = 200
+BACKFILL_CURSOR_FRAMES = 256
+
+# Logs websocket endpoints raced against each other, first arrival of a signature wins
+LOG_WS_ENDPOINTS = [WS_URL]
+
+# Derived pool/vault addresses kept in memory, and CPMM/CLMM fee tiers tried when matching a pool
+DERIVE_CACHE_SIZE = 4096
+POOL_CONFIG_INDEXES = 8
+
+# JSON-RPC calls issued within this window (s) are sent as one batch of at most RPC_BATCH_MAX calls
+RPC_BATCH_WINDOW = 0.002
+RPC_BATCH_MAX = 50
+
+# Retry backoff (s): first delay, cap, and how long transaction lookups may keep polling
+RETRY_BASE_DELAY = 0.025
+RETRY_MAX_DELAY = 0.4
+RETRY_DEADLINE = 10.0
+TX_FETCH_DEADLINE = 30.0
+SWAP_CONFIRM_DEADLINE = 20.0
+
+# Metadata cache: on-disk store (None disables persistence), entry caps, TTLs (s) and save interval (s)
+CACHE_PATH = "dev/cache.json"
+CACHE_TX_SIZE = 512
+CACHE_TX_TTL = 60 * 60
+CACHE_MINT_SIZE = 10_000
+CACHE_MINT_TTL = 24 * 60 * 60
+CACHE_SAVE_INTERVAL = 60
+
+# Provider credit budget shared by all outbound RPC/HTTP traffic (requests per second, bucket size)
+RATE_LIMIT_RPS = 50
+RATE_LIMIT_BURST = 50
+
+# HTTP connection pools
+HTTP_POOL_LIMIT = 100               # Total open connections across all hosts
+HTTP_POOL_PER_HOST = 32             # Open connections per host
+HTTP_KEEPALIVE = 75                 # Seconds an idle connection stays open
+HTTP_DNS_TTL = 600                  # Seconds a DNS lookup is cached
+HTTP_TIMEOUT = 15                   # Total request timeout
+HTTP_PREWARM_CONNECTIONS = 8        # RPC connections opened at startup and kept hot
+HTTP_KEEP_HOT_INTERVAL = 30         # Seconds between keep-hot pings, below HTTP_KEEPALIVE
+HTTP_PREWARM_HOSTS = ["https://api.dexscreener.com"]
+
+# Pool pricing: "logs" prices AMM v4 pools from swap ray_logs on the logs stream, "accounts" subscribes to both vaults
+PRICE_FEED = "logs"
+# AMM v4 swap records matching no pool are kept this long (s, at most this many) for a pool to reach their reserves;
+# a pool matching nothing for PRICE_FEED_STALE seconds while records go unmatched falls back to vault subscriptions
+PRICE_FEED_BUFFER = 2.0
+PRICE_FEED_BUFFER_SIZE = 4096
+PRICE_FEED_STALE = 5.0
+
+# Token account subscription encoding: "base64" decodes the raw SPL layout, "jsonParsed" uses the RPC's parsed view
+ACCOUNT_ENCODING = "base64"
+
+# Samples kept per vault balance history (ring buffer, oldest overwritten)
+SERIES_CAPACITY = 4096
+
+# Concurrent sessions: tracked mints, open positions and total USD at risk across all of them
+MAX_SESSIONS = 200
+MAX_OPEN_POSITIONS = 5
+MAX_EXPOSURE_USD = 5.0
+BUY_AMOUNT_USD = 1
+SESSION_PRICE_TIMEOUT = 30          # Seconds a detected pool may hold a session slot before its first price
+
+# Sharded mode (python shard.py): worker processes tracking sessions, None = one per core besides the coordinator
+SHARD_WORKERS = None
+SHARD_COORDINATOR_SHARE = 0.5       # Rate budget fraction kept by the coordinator (detection, buys, sells); workers split the rest
+
+# Session indicators: candle length (s), candles kept, rolling VWAP/high/low window (s), EMA spans (ticks)
+INDICATOR_CANDLE_INTERVAL = 1
+INDICATOR_CANDLES = 600
+INDICATOR_WINDOW = 60
+INDICATOR_EMA_FAST = 12
+INDICATOR_EMA_SLOW = 48
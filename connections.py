@@ -0,0 +1,101 @@
+import asyncio
+import logging
+
+import aiohttp
+
+try:
+    from .common_ import *
+    from .colors import *
+    from .limiter import ANALYTICS
+except ImportError:
+    from common_ import *
+    from colors import *
+    from limiter import ANALYTICS
+
+
+class ConnectionPools:
+    """
+    Shared aiohttp session for RPC, Jupiter and Dexscreener traffic.
+
+    The connector caps connections per host, keeps them alive between calls
+    and caches DNS. `prewarm` opens connections before the first real request
+    and `keep_hot` sends cheap calls so they are not closed while idle; both
+    take their tokens from the analytics lane of `limiter` when one is given.
+    Connection creation and reuse are counted through aiohttp tracing.
+    """
+
+    def __init__(self, limit=HTTP_POOL_LIMIT, limit_per_host=HTTP_POOL_PER_HOST, keepalive=HTTP_KEEPALIVE, dns_ttl=HTTP_DNS_TTL, limiter=None):
+        self.limiter = limiter
+        self.created = 0
+        self.reused = 0
+        trace = aiohttp.TraceConfig()
+        trace.on_connection_create_end.append(self._on_create)
+        trace.on_connection_reuseconn.append(self._on_reuse)
+        self.connector = aiohttp.TCPConnector(
+            limit=limit,
+            limit_per_host=limit_per_host,
+            keepalive_timeout=keepalive,
+            ttl_dns_cache=dns_ttl,
+            use_dns_cache=True,
+            enable_cleanup_closed=True,
+        )
+        self.session = aiohttp.ClientSession(
+            connector=self.connector,
+            trace_configs=[trace],
+            timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT),
+        )
+
+    async def _on_create(self, session, context, params):
+        self.created += 1
+
+    async def _on_reuse(self, session, context, params):
+        self.reused += 1
+
+    async def _ping_rpc(self, url):
+        if self.limiter is not None:
+            await self.limiter.acquire(ANALYTICS)
+        payload = {"jsonrpc": "2.0", "id": 1, "method": "getHealth"}
+        async with self.session.post(url, json=payload) as response:
+            await response.read()
+
+    async def _ping_http(self, url):
+        if self.limiter is not None:
+            await self.limiter.acquire(ANALYTICS)
+        async with self.session.head(url) as response:
+            await response.read()
+
+    async def prewarm(self, rpc_url=RPC_URL, connections=HTTP_PREWARM_CONNECTIONS, hosts=HTTP_PREWARM_HOSTS):
+        """Open `connections` concurrent connections to the RPC and one to each extra host."""
+        results = await asyncio.gather(
+            *(self._ping_rpc(rpc_url) for _ in range(connections)),
+            *(self._ping_http(url) for url in hosts),
+            return_exceptions=True,
+        )
+        failed = sum(1 for result in results if isinstance(result, Exception))
+        logging.info(f"{cc.LIGHT_BLUE}Pre-warmed {self.created} connections ({failed} failed){cc.RESET}")
+
+    async def keep_hot(self, stop_event, rpc_url=RPC_URL, connections=HTTP_PREWARM_CONNECTIONS, interval=HTTP_KEEP_HOT_INTERVAL):
+        """Ping the RPC on all warm connections before keep-alive would close them."""
+        while not stop_event.is_set():
+            await asyncio.sleep(interval)
+            await asyncio.gather(*(self._ping_rpc(rpc_url) for _ in range(connections)), return_exceptions=True)
+
+    def stats(self):
+        total = self.created + self.reused
+        return {
+            "created": self.created,
+            "reused": self.reused,
+            "reuse_rate": self.reused / total if total else 0.0,
+        }
+
+    async def report(self, stop_event, interval=LOG_STATS_INTERVAL):
+        while not stop_event.is_set():
+            await asyncio.sleep(interval)
+            stats = self.stats()
+            logging.info(
+                f"{cc.LIGHT_GRAY}HTTP connections: created={stats['created']} reused={stats['reused']} "
+                f"reuse_rate={stats['reuse_rate']:.0%}{cc.RESET}"
+            )
+
+    async def close(self):
+        await self.session.close()
@@ -0,0 +1,94 @@
+from functools import lru_cache
+
+from solders.pubkey import Pubkey
+
+try:
+    from .common_ import *
+except ImportError:
+    from common_ import *
+
+# Raydium AMM v4 associated seeds (pools created through initialize2)
+AMM_ASSOCIATED_SEED = b"amm_associated_seed"
+COIN_VAULT_ASSOCIATED_SEED = b"coin_vault_associated_seed"
+PC_VAULT_ASSOCIATED_SEED = b"pc_vault_associated_seed"
+
+# Raydium CPMM / CLMM seeds
+AMM_CONFIG_SEED = b"amm_config"
+POOL_SEED = b"pool"
+POOL_VAULT_SEED = b"pool_vault"
+
+
+@lru_cache(maxsize=DERIVE_CACHE_SIZE)
+def find_pda(program: str, *seeds: bytes) -> str:
+    """Cached Pubkey.find_program_address returning the address as a base58 string."""
+    address, _ = Pubkey.find_program_address(list(seeds), Pubkey.from_string(program))
+    return str(address)
+
+
+def _key(address: str) -> bytes:
+    return bytes(Pubkey.from_string(address))
+
+
+def sort_mints(mint_a: str, mint_b: str) -> tuple:
+    """Order a mint pair the way CPMM/CLMM pools do (token_0 < token_1 by key bytes)."""
+    return (mint_a, mint_b) if _key(mint_a) < _key(mint_b) else (mint_b, mint_a)
+
+
+def amm_v4_keys(market: str, program: str = RLQ4) -> dict:
+    """
+    Derive the Raydium AMM v4 pool id and vaults from its OpenBook market.
+    Pools created through initialize2 use these associated addresses.
+    """
+    program_seed, market_seed = _key(program), _key(market)
+    return {
+        "amm": find_pda(program, program_seed, market_seed, AMM_ASSOCIATED_SEED),
+        "coin_vault": find_pda(program, program_seed, market_seed, COIN_VAULT_ASSOCIATED_SEED),
+        "pc_vault": find_pda(program, program_seed, market_seed, PC_VAULT_ASSOCIATED_SEED),
+    }
+
+
+def amm_config(program: str, index: int) -> str:
+    """AmmConfig PDA for a CPMM/CLMM fee tier index."""
+    return find_pda(program, AMM_CONFIG_SEED, index.to_bytes(2, "big"))
+
+
+def _concentrated_keys(program: str, mint_a: str, mint_b: str, config_index: int) -> dict:
+    token_0, token_1 = sort_mints(mint_a, mint_b)
+    config = amm_config(program, config_index)
+    pool = find_pda(program, POOL_SEED, _key(config), _key(token_0), _key(token_1))
+    return {
+        "pool": pool,
+        "amm_config": config,
+        "token_0_mint": token_0,
+        "token_1_mint": token_1,
+        "vault_0": find_pda(program, POOL_VAULT_SEED, _key(pool), _key(token_0)),
+        "vault_1": find_pda(program, POOL_VAULT_SEED, _key(pool), _key(token_1)),
+    }
+
+
+def cpmm_pool_keys(mint_a: str, mint_b: str, config_index: int = 0, program: str = RPLMM) -> dict:
+    """Derive a Raydium CPMM pool state and its two vaults from the mint pair."""
+    return _concentrated_keys(program, mint_a, mint_b, config_index)
+
+
+def clmm_pool_keys(mint_a: str, mint_b: str, config_index: int = 0, program: str = RCLMM) -> dict:
+    """Derive a Raydium CLMM pool state and its two vaults from the mint pair."""
+    return _concentrated_keys(program, mint_a, mint_b, config_index)
+
+
+def vault_for(keys: dict, mint: str) -> str:
+    """Pick the CPMM/CLMM vault holding `mint`."""
+    return keys["vault_0"] if keys["token_0_mint"] == mint else keys["vault_1"]
+
+
+def find_pool_keys(program: str, mint: str, account_keys, quote: str = SOL_ADDRESS, config_indexes: int = POOL_CONFIG_INDEXES):
+    """
+    Find the CPMM/CLMM pool for `mint`/`quote` whose derived address appears in
+    `account_keys`, trying each fee tier. Returns None when nothing matches.
+    """
+    derive = cpmm_pool_keys if program == RPLMM else clmm_pool_keys
+    for index in range(config_indexes):
+        keys = derive(mint, quote, index, program)
+        if keys["pool"] in account_keys:
+            return keys
+    return None
@@ -5,14 +5,22 @@ import asyncio, json
 
 from typing import List, Dict, Any
 
+try:
+    from .limiter import ANALYTICS
+except ImportError:
+    from limiter import ANALYTICS
+
 GET_CHAIN_ADDR_INFO = "https://api.dexscreener.com/latest/dex/tokens"
 
 class AsyncDex:
-    def __init__(self, session: aiohttp.ClientSession):
+    def __init__(self, session: aiohttp.ClientSession, limiter=None):
         self.session = session
+        self.limiter = limiter
 
     async def get_chain_address_info(self, address: str) -> Dict[str, Any]:
         is_boosted, boosts = False, 0
+        if self.limiter is not None:
+            await self.limiter.acquire(ANALYTICS)
         response = await self.session.get(f"{GET_CHAIN_ADDR_INFO}/{address}")
         hResponse = await response.json()
         if hResponse is not None:
@@ -0,0 +1,308 @@
+from collections import deque
+
+try:
+    from .common_ import *
+    from .series import RingSeries
+    from .pricing import pct_change, to_float
+except ImportError:
+    from common_ import *
+    from series import RingSeries
+    from pricing import pct_change, to_float
+
+
+class Candles:
+    """Rolling OHLC candles of `interval` seconds; the last `size` closed candles are kept."""
+
+    __slots__ = ("interval", "bars", "start", "open", "high", "low", "close", "volume")
+
+    def __init__(self, interval=INDICATOR_CANDLE_INTERVAL, size=INDICATOR_CANDLES):
+        self.interval = interval
+        self.bars = deque(maxlen=size)  # (start, open, high, low, close, volume)
+        self.start = None
+        self.open = self.high = self.low = self.close = 0
+        self.volume = 0.0
+
+    def update(self, timestamp, price, volume=0.0):
+        start = timestamp - timestamp % self.interval
+        if start != self.start:
+            if self.start is not None:
+                self.bars.append(self.current())
+            self.start = start
+            self.open = self.high = self.low = self.close = price
+            self.volume = volume
+            return
+        if price > self.high:
+            self.high = price
+        elif price < self.low:
+            self.low = price
+        self.close = price
+        self.volume += volume
+
+    def current(self):
+        """The candle still being built."""
+        return (self.start, self.open, self.high, self.low, self.close, self.volume)
+
+
+class Ema:
+    """Exponential moving average over roughly `span` updates."""
+
+    __slots__ = ("alpha", "value")
+
+    def __init__(self, span):
+        self.alpha = 2 / (span + 1)
+        self.value = None
+
+    def update(self, value):
+        if self.value is None:
+            self.value = float(value)
+        else:
+            self.value += self.alpha * (value - self.value)
+        return self.value
+
+
+class RollingVwap:
+    """
+    Volume-weighted average price over the last `window` seconds.
+    Only trades with a known SOL volume count; running sums make each update amortized O(1).
+    """
+
+    __slots__ = ("window", "trades", "price_volume", "volume")
+
+    def __init__(self, window=INDICATOR_WINDOW):
+        self.window = window
+        self.trades = deque()  # (timestamp, price * volume, volume)
+        self.price_volume = 0.0
+        self.volume = 0.0
+
+    def update(self, timestamp, price, volume):
+        if volume > 0:
+            weighted = price * volume
+            self.trades.append((timestamp, weighted, volume))
+            self.price_volume += weighted
+            self.volume += volume
+        self._expire(timestamp)
+
+    def _expire(self, now):
+        trades, cutoff = self.trades, now - self.window
+        while trades and trades[0][0] < cutoff:
+            _, weighted, volume = trades.popleft()
+            self.price_volume -= weighted
+            self.volume -= volume
+        if not trades:
+            self.price_volume = self.volume = 0.0
+
+    @property
+    def value(self):
+        return self.price_volume / self.volume if self.volume > 0 else None
+
+
+class RollingExtremes:
+    """Rolling min/max over the last `window` seconds with monotonic deques (amortized O(1) per update)."""
+
+    __slots__ = ("window", "highs", "lows", "last")
+
+    def __init__(self, window=INDICATOR_WINDOW):
+        self.window = window
+        self.highs = deque()  # (timestamp, price), prices decreasing
+        self.lows = deque()   # (timestamp, price), prices increasing
+        self.last = 0
+
+    def update(self, timestamp, price):
+        highs, lows = self.highs, self.lows
+        while highs and highs[-1][1] <= price:
+            highs.pop()
+        highs.append((timestamp, price))
+        while lows and lows[-1][1] >= price:
+            lows.pop()
+        lows.append((timestamp, price))
+        cutoff = timestamp - self.window
+        while highs[0][0] < cutoff:
+            highs.popleft()
+        while lows[0][0] < cutoff:
+            lows.popleft()
+        self.last = price
+
+    @property
+    def high(self):
+        return self.highs[0][1] if self.highs else 0
+
+    @property
+    def low(self):
+        return self.lows[0][1] if self.lows else 0
+
+    def drawdown(self):
+        """Percent below the rolling high (<= 0)."""
+        return pct_change(self.high, self.last)
+
+    def rebound(self):
+        """Percent above the rolling low (>= 0)."""
+        return pct_change(self.low, self.last)
+
+
+class TradeFlow:
+    """Buy/sell counts and SOL volume since the session opened."""
+
+    __slots__ = ("buys", "sells", "buy_sol", "sell_sol")
+
+    def __init__(self):
+        self.buys = 0
+        self.sells = 0
+        self.buy_sol = 0.0
+        self.sell_sol = 0.0
+
+    def record(self, side, sol_amount=0.0):
+        if side == "buy":
+            self.buys += 1
+            self.buy_sol += sol_amount
+        elif side == "sell":
+            self.sells += 1
+            self.sell_sol += sol_amount
+
+    def sell_ratio(self):
+        """Sells per 100 buys, 0 before the first buy."""
+        return self.sells * 100 / self.buys if self.buys else 0
+
+    def snapshot(self):
+        return {"buy": self.buys, "sell": self.sells, "buy_sol": self.buy_sol, "sell_sol": self.sell_sol}
+
+
+class Momentum:
+    """Net score of price rises (+step) and falls (-step) since the last reset."""
+
+    __slots__ = ("step", "value")
+
+    def __init__(self, step=0.01):
+        self.step = step
+        self.value = 0.0
+
+    def update(self, previous, price):
+        if price > previous:
+            self.value += self.step
+        elif price < previous:
+            self.value -= self.step
+
+    def reset(self):
+        self.value = 0.0
+
+
+class ChangeSteps:
+    """
+    Steps between successive change percentages since the last reset: the
+    first step is the change itself, later ones the difference to the
+    previous change. The running minimum answers "were all steps >= floor"
+    without rescanning; the last `size` steps are kept for the session record.
+    """
+
+    __slots__ = ("steps", "minimum", "previous", "count")
+
+    def __init__(self, size=INDICATOR_CANDLES):
+        self.steps = deque(maxlen=size)
+        self.minimum = float("inf")
+        self.previous = 0
+        self.count = 0
+
+    def update(self, change_pct):
+        if change_pct == self.previous:
+            return
+        step = round(change_pct - self.previous if self.count else change_pct, 2)
+        self.previous = change_pct
+        self.count += 1
+        self.steps.append(step)
+        if step < self.minimum:
+            self.minimum = step
+
+    def all_above(self, floor):
+        return self.minimum >= floor
+
+    def reset(self):
+        self.steps.clear()
+        self.minimum = float("inf")
+        self.count = 0
+
+
+class SessionIndicators:
+    """
+    Incremental indicators of one session. `trade` runs for every trade
+    reported for the mint; `tick` runs once per price change the strategy
+    evaluates. Every update is O(1) (amortized for the rolling windows) and
+    all history is bounded.
+    """
+
+    __slots__ = ("ticks", "history", "candles", "ema_fast", "ema_slow", "vwap", "extremes", "flow", "momentum", "steps")
+
+    def __init__(self):
+        self.ticks = 0
+        self.history = RingSeries(SERIES_CAPACITY)  # SOL prices of the evaluated ticks, for the session record
+        self.candles = Candles()
+        self.ema_fast = Ema(INDICATOR_EMA_FAST)
+        self.ema_slow = Ema(INDICATOR_EMA_SLOW)
+        self.vwap = RollingVwap()
+        self.extremes = RollingExtremes()
+        self.flow = TradeFlow()
+        self.momentum = Momentum()
+        self.steps = ChangeSteps()
+
+    def trade(self, timestamp, price, side, sol_amount=0.0):
+        self.flow.record(side, sol_amount)
+        self.candles.update(timestamp, price, sol_amount)
+        self.ema_fast.update(price)
+        self.ema_slow.update(price)
+        self.vwap.update(timestamp, price, sol_amount)
+        self.extremes.update(timestamp, price)
+
+    def tick(self, timestamp, previous, price, change_pct):
+        self.ticks += 1
+        self.history.append(timestamp, to_float(price))
+        self.momentum.update(previous, price)
+        self.steps.update(change_pct)
+
+    def summary(self):
+        """Display values (floats) for logs and the session record."""
+        vwap = self.vwap.value
+        return {
+            "ema_fast": to_float(self.ema_fast.value or 0),
+            "ema_slow": to_float(self.ema_slow.value or 0),
+            "vwap": to_float(vwap) if vwap is not None else None,
+            "high": to_float(self.extremes.high),
+            "low": to_float(self.extremes.low),
+            "drawdown_pct": self.extremes.drawdown(),
+        }
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    rng = random.Random(3)
+    extremes, prices = RollingExtremes(window=50), []
+    for t in range(2_000):
+        price = rng.randrange(1, 10_000)
+        prices.append(price)
+        extremes.update(t, price)
+        recent = prices[-51:]
+        assert extremes.high == max(recent) and extremes.low == min(recent)
+
+    steps, pct_diff, prev = ChangeSteps(), [], 0
+    for change in (0, 5.0, 5.0, -7.5, 3.25, -20.0):
+        steps.update(change)
+        if change != prev:
+            pct_diff.append(round(change if not pct_diff else change - prev, 2))
+            prev = change
+        assert list(steps.steps) == pct_diff and steps.all_above(-10) == all(d >= -10 for d in pct_diff)
+
+    # Per-tick cost as the session grows: list rescans vs incremental indicators
+    for n in (1_000, 5_000, 20_000):
+        history, pct_diff = [], []
+        started = time.perf_counter()
+        for i in range(n):
+            history.append(i)
+            pct_diff.append(0.5)
+            all(diff >= -10 for diff in pct_diff)
+        rescan = (time.perf_counter() - started) / n
+        indicators = SessionIndicators()
+        started = time.perf_counter()
+        for i in range(n):
+            indicators.trade(i * 0.1, 10 ** 12 + i, "buy", 0.1)
+            indicators.tick(i * 0.1, 10 ** 12 + i - 1, 10 ** 12 + i, 0.5 * i)
+        incremental = (time.perf_counter() - started) / n
+        print(f"{n:>7} ticks: rescan {rescan * 1e6:8.2f} us/tick, indicators {incremental * 1e6:5.2f} us/tick")
@@ -0,0 +1,430 @@
+import asyncio
+import json
+import logging
+import re
+import time
+import traceback
+from collections import OrderedDict, deque
+
+import websockets
+
+try:
+    from .common_ import *
+    from .colors import *
+    from .limiter import ANALYTICS
+except ImportError:
+    from common_ import *
+    from colors import *
+    from limiter import ANALYTICS
+
+
+# Providers may pretty-print frames, so whitespace is allowed after every ':'
+_SLOT = {str: re.compile(r'"slot":\s*(\d+)'), bytes: re.compile(rb'"slot":\s*(\d+)')}
+_SIGNATURE = {str: re.compile(r'"signature":\s*"(\w+)"'), bytes: re.compile(rb'"signature":\s*"(\w+)"')}
+_SUBSCRIPTION = {str: '"subscription":', bytes: b'"subscription":'}
+_INT = {str: re.compile(r"\s*(\d+)"), bytes: re.compile(rb"\s*(\d+)")}
+
+
+def scan_frame(frame):
+    """
+    Pull (slot, signature, subscription) out of a raw logsNotification frame
+    without decoding it. Missing fields come back as None.
+    """
+    kind = type(frame)
+    slot = _SLOT[kind].search(frame)
+    signature = _SIGNATURE[kind].search(frame)
+    index = frame.rfind(_SUBSCRIPTION[kind])
+    subscription = _INT[kind].match(frame, index + 15) if index >= 0 else None
+
+    signature = signature.group(1) if signature else None
+    if isinstance(signature, bytes):
+        signature = signature.decode()
+    return (
+        int(slot.group(1)) if slot else None,
+        signature,
+        int(subscription.group(1)) if subscription else None,
+    )
+
+
+class SignatureLRU:
+    """Bounded set of recently seen transaction signatures."""
+
+    def __init__(self, maxsize=LOG_DEDUP_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.duplicates = 0
+
+    def seen(self, signature):
+        """Return True if `signature` was already seen, otherwise remember it."""
+        return self.first(signature) is not None
+
+    def first(self, signature, value=True):
+        """Return the value stored with the first sighting of `signature`, storing `value` if new."""
+        previous = self.entries.get(signature)
+        if previous is not None:
+            self.entries.move_to_end(signature)
+            self.duplicates += 1
+            return previous
+        self.entries[signature] = value
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return None
+
+    def __contains__(self, signature):
+        return signature in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class FramePrefilter:
+    """
+    Cheap substring checks on raw logsNotification frames, run before any JSON decoding.
+
+    Only frames for successful transactions that mention a pool/mint
+    initialization (AMM v4/CPMM) or a CLMM CreatePool instruction are forwarded. Anything that is not a logs notification
+    (subscription responses, errors) always passes. The candidates are
+    plain substrings checked first; the success check allows the whitespace
+    of pretty-printed frames and only runs on the few candidate frames.
+    """
+
+    NOTIFICATION = '"logsNotification"'
+    OK = r'"err":\s*null'
+    CANDIDATES = ("InitializeMint", "initialize2", "Instruction: CreatePool")
+
+    def __init__(self):
+        self.frames_seen = 0
+        self.frames_dropped = 0
+        self.frames_forwarded = 0
+        self._needles = {
+            str: (self.NOTIFICATION, re.compile(self.OK), self.CANDIDATES),
+            bytes: (self.NOTIFICATION.encode(), re.compile(self.OK.encode()), tuple(c.encode() for c in self.CANDIDATES)),
+        }
+
+    def accept(self, frame):
+        notification, ok, candidates = self._needles[type(frame)]
+        if notification not in frame:
+            return True
+        self.frames_seen += 1
+        for candidate in candidates:
+            if candidate in frame:
+                if ok.search(frame) is not None:
+                    self.frames_forwarded += 1
+                    return True
+                break
+        self.frames_dropped += 1
+        return False
+
+    def stats(self):
+        return {"seen": self.frames_seen, "dropped": self.frames_dropped, "forwarded": self.frames_forwarded}
+
+
+class EndpointStats:
+    """Per-endpoint first-arrival wins and lag behind the winning endpoint."""
+
+    def __init__(self):
+        self.wins = 0
+        self.copies = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+
+    def record_lag(self, lag):
+        self.copies += 1
+        self.total_lag += lag
+        if lag > self.max_lag:
+            self.max_lag = lag
+
+    def snapshot(self, total):
+        return {
+            "win_rate": self.wins / total if total else 0.0,
+            "avg_lag_ms": self.total_lag / self.copies * 1000 if self.copies else 0.0,
+            "max_lag_ms": self.max_lag * 1000,
+        }
+
+
+class LogIngestor:
+    """
+    Subscribes to logs of several programs on every endpoint in `ws_urls`
+    (one websocket each) and merges them into a single queue. Each signature
+    is forwarded from whichever endpoint delivers it first; later copies are
+    dropped before decoding and only feed the per-endpoint lag statistics.
+    Queue entries are `(received_at, message)` tuples.
+
+    Every frame first goes through the substring prefilter; only frames that
+    pass it (or that the swap sink needs) are scanned for their signature and
+    de-duplicated, so dropped frames cost a few `in` checks. The newest
+    notification frames are kept as is and only scanned after a reconnect:
+    the newest slot bounds the gap, and each program's newest signature
+    stops its paginated getSignaturesForAddress walk through `rpc` (an
+    RpcBatcher). The signatures found are de-duplicated across programs and
+    at most BACKFILL_MAX_TX of the newest are fetched concurrently on the
+    ANALYTICS lane, so a long gap cannot starve live detection; the ones
+    that pass the prefilter are forwarded like live logs, marked as backfill
+    so the queue does not expire them by slot. A gap exists only while no
+    endpoint is connected, so a reconnect backfills only if every endpoint
+    was down, and only the first endpoint back does it.
+
+    When a `swap_sink` (a SwapPriceFeed) is given, every first-arrival frame
+    that passes the prefilter, and every other one while it tracks pools, is
+    handed to its `feed` before being queued: swap logs update prices without
+    going through the queue, and pool creations are tracked before any of
+    their swaps can arrive.
+    """
+
+    def __init__(self, logs, stop_event, programs=LOG_PROGRAMS, ws_urls=LOG_WS_ENDPOINTS, rpc=None, swap_sink=None):
+        self.logs = logs
+        self.stop_event = stop_event
+        self.programs = list(programs)
+        self.ws_urls = [ws_urls] if isinstance(ws_urls, str) else list(ws_urls)
+        self.rpc = rpc
+        self.swap_sink = swap_sink
+        self.seen = SignatureLRU()
+        self.live = SignatureLRU()      # {signature: (first arrival, endpoint)}
+        self.prefilter = FramePrefilter()
+        self.endpoints = {url: EndpointStats() for url in self.ws_urls}
+        self.recent = deque(maxlen=BACKFILL_CURSOR_FRAMES)  # (raw frame, {subscription id: program}), newest last
+        self.backfill_slots = asyncio.Semaphore(BACKFILL_CONCURRENCY)
+        self.connected = 0              # Endpoints currently subscribed
+        self.tasks = set()
+
+    async def subscribe(self, ws):
+        """Send one logsSubscribe per program on the same connection."""
+        for index, program in enumerate(self.programs):
+            await ws.send(json.dumps({
+                "jsonrpc": "2.0",
+                "method": "logsSubscribe",
+                "params": [{"mentions": [program]}, {"commitment": "processed"}],
+                "id": index,
+            }))
+
+    def _on_response(self, message, sub_programs):
+        index = message.get("id")
+        if "result" in message and isinstance(index, int) and index < len(self.programs):
+            program = self.programs[index]
+            sub_programs[message["result"]] = program
+            logging.info(f"Subscribed to logs for program {program}")
+        else:
+            logging.warning(f"Unexpected response: {message}")
+
+    async def forward(self, message):
+        """Push a logs notification into the queue unless its signature was already seen."""
+        signature = message.get("params", {}).get("result", {}).get("value", {}).get("signature")
+        if signature and self.seen.seen(signature):
+            return False
+        await self.logs.put((time.monotonic(), message))
+        return True
+
+    def track(self, frame, ws_url):
+        """
+        Record the arrival of a raw notification frame from `ws_url`.
+        Returns False if another endpoint already delivered the same signature.
+        """
+        _, signature, _ = scan_frame(frame)
+        if signature is None:
+            return True
+        now = time.monotonic()
+        first = self.live.first(signature, (now, ws_url))
+        if first is not None:
+            if first[1] != ws_url:
+                self.endpoints[ws_url].record_lag(now - first[0])
+            return False
+        self.endpoints[ws_url].wins += 1
+        return True
+
+    def cursor(self):
+        """
+        {program: (slot, signature or None)} where the backfill of each program
+        stops: the newest slot seen, and the program's newest signature among
+        the recent frames.
+        """
+        newest, signatures = None, {}
+        for frame, sub_programs in reversed(self.recent):
+            slot, signature, subscription = scan_frame(frame)
+            if slot is None:
+                continue
+            if newest is None:
+                newest = slot
+            program = sub_programs.get(subscription)
+            if program is not None and signature and program not in signatures:
+                signatures[program] = signature
+                if len(signatures) == len(self.programs):
+                    break
+        if newest is None:
+            return {}
+        return {program: (newest, signatures.get(program)) for program in self.programs}
+
+    async def backfill(self, cursor):
+        """Recover notifications missed between `cursor` and now for every program."""
+        started = time.monotonic()
+        walks = await asyncio.gather(
+            *(self._backfill_signatures(program, slot, signature) for program, (slot, signature) in cursor.items()),
+            return_exceptions=True,
+        )
+        missing = {}  # {signature: entry}; a transaction can mention several programs
+        for program, walk in zip(cursor, walks):
+            if isinstance(walk, Exception):
+                logging.error(f"Backfill failed for {program}: {walk}")
+                continue
+            for entry in walk:
+                missing.setdefault(entry["signature"], entry)
+        entries = sorted(missing.values(), key=lambda entry: entry.get("slot", 0), reverse=True)
+        if len(entries) > BACKFILL_MAX_TX:
+            logging.warning(f"Backfill gap holds {len(entries)} transactions, fetching only the newest {BACKFILL_MAX_TX}")
+            entries = entries[:BACKFILL_MAX_TX]
+
+        results = await asyncio.gather(*(self._backfill_tx(entry) for entry in entries), return_exceptions=True)
+        failed = sum(1 for result in results if isinstance(result, Exception))
+        if failed:
+            logging.warning(f"Backfill: {failed}/{len(entries)} transactions could not be fetched")
+        recovered = sum(1 for result in results if result is True)
+        logging.info(
+            f"{cc.LIGHT_BLUE}Backfill recovered {recovered} logs from {len(entries)} transactions "
+            f"in {time.monotonic() - started:.2f}s{cc.RESET}"
+        )
+
+    async def _backfill_signatures(self, program, last_slot, last_signature):
+        """Successful signatures of `program` after the cursor that were not delivered live, newest first."""
+        missing, before = [], None
+        for _ in range(BACKFILL_MAX_PAGES):
+            options = {"limit": BACKFILL_PAGE_SIZE, "commitment": "confirmed"}
+            if last_signature:
+                options["until"] = last_signature
+            if before:
+                options["before"] = before
+            page = (await self.rpc.call("getSignaturesForAddress", [program, options], ANALYTICS)).get("result") or []
+            reached = False
+            for entry in page:
+                if entry.get("slot", 0) < last_slot:
+                    reached = True
+                    break
+                signature = entry.get("signature")
+                if entry.get("err") is None and signature not in self.live and signature not in self.seen:
+                    missing.append(entry)
+            if reached or len(page) < BACKFILL_PAGE_SIZE:
+                break
+            if len(missing) >= BACKFILL_MAX_TX:
+                logging.warning(f"Backfill of {program} stopped paging after {len(missing)} signatures")
+                break
+            before = page[-1]["signature"]
+        return missing
+
+    async def _backfill_tx(self, entry):
+        signature = entry["signature"]
+        async with self.backfill_slots:
+            if signature in self.seen:
+                return False
+            res = await self.rpc.call("getTransaction", [
+                signature,
+                {"commitment": "confirmed", "encoding": "json", "maxSupportedTransactionVersion": 0},
+            ], ANALYTICS)
+        tx = (res or {}).get("result")
+        if not tx or tx.get("meta", {}).get("err") is not None:
+            return False
+        logs = tx.get("meta", {}).get("logMessages") or []
+        if not any(candidate in log for log in logs for candidate in FramePrefilter.CANDIDATES):
+            return False
+        return await self.forward({
+            "jsonrpc": "2.0",
+            "method": "logsNotification",
+            "backfill": True,
+            "params": {
+                "result": {
+                    "context": {"slot": tx.get("slot", entry.get("slot", 0))},
+                    "value": {"signature": signature, "err": None, "logs": logs},
+                },
+                "subscription": None,
+            },
+        })
+
+    async def report(self):
+        while not self.stop_event.is_set():
+            await asyncio.sleep(LOG_STATS_INTERVAL)
+            stats = self.prefilter.stats()
+            logging.info(
+                f"{cc.LIGHT_GRAY}Log frames: seen={stats['seen']} dropped={stats['dropped']} "
+                f"forwarded={stats['forwarded']} duplicates={self.live.duplicates}{cc.RESET}"
+            )
+            if len(self.endpoints) > 1:
+                total = sum(endpoint.wins for endpoint in self.endpoints.values())
+                for url, endpoint in self.endpoints.items():
+                    snap = endpoint.snapshot(total)
+                    logging.info(
+                        f"{cc.LIGHT_GRAY}Endpoint {url.split('?')[0]}: win_rate={snap['win_rate']:.1%} "
+                        f"avg_lag={snap['avg_lag_ms']:.1f}ms max_lag={snap['max_lag_ms']:.1f}ms{cc.RESET}"
+                    )
+
+    async def run(self):
+        reporter = asyncio.create_task(self.report())
+        try:
+            await asyncio.gather(*(self._run(url) for url in self.ws_urls))
+        finally:
+            reporter.cancel()
+
+    async def _run(self, ws_url):
+        while not self.stop_event.is_set():
+            sub_programs = {}  # {subscription id: program}
+            counted = False
+            try:
+                async with websockets.connect(
+                    ws_url,
+                    ping_interval=15,
+                    ping_timeout=60,
+                    max_size=10**6,
+                ) as ws:
+                    await self.subscribe(ws)
+                    gap = self.connected == 0  # Otherwise another endpoint saw everything meanwhile
+                    self.connected += 1
+                    counted = True
+                    cursor = self.cursor() if gap and self.rpc is not None else None
+                    if cursor:
+                        logging.info(f"Backfilling logs missed since slot {min(slot for slot, _ in cursor.values())}")
+                        task = asyncio.create_task(self.backfill(cursor))
+                        self.tasks.add(task)
+                        task.add_done_callback(self.tasks.discard)
+
+                    # Process incoming messages
+                    while not self.stop_event.is_set():
+                        try:
+                            message = await ws.recv()
+                            accepted = self.prefilter.accept(message)
+                            sink = self.swap_sink if self.swap_sink is not None and (accepted or len(self.swap_sink)) else None
+                            if not accepted:
+                                self.recent.append((message, sub_programs))
+                                if sink is None:
+                                    continue
+                            if not self.track(message, ws_url):
+                                continue
+                            if sink is not None:
+                                sink.feed(message)
+                            if not accepted:
+                                continue
+                            hMessage = json.loads(message)
+                            if "method" in hMessage:
+                                self.recent.append((message, sub_programs))
+                                await self.forward(hMessage)
+                            else:
+                                self._on_response(hMessage, sub_programs)
+                        except json.JSONDecodeError as e:
+                            logging.warning(f"JSON decode error, ignoring message: {e}")
+                            continue
+                        except asyncio.exceptions.IncompleteReadError as e:
+                            logging.warning(f"Incomplete message read, ignoring: {e}")
+                            continue
+                        except websockets.exceptions.ConnectionClosedError as e:
+                            logging.warning(f"Connection unexpectedly closed: {e}")
+                            break
+                        except Exception as e:
+                            logging.error(f"Unexpected error while receiving message: {e}")
+                            continue
+
+            except websockets.exceptions.ConnectionClosedError as e:
+                logging.warning(f"Connection closed unexpectedly during setup: {e}. Retrying...")
+            except Exception as e:
+                logging.error(f"Unexpected error in logs subscription: {e}")
+                traceback.print_exc()
+
+            finally:
+                if counted:
+                    self.connected -= 1
+                logging.info("Reconnecting in 1 second...")
+                await asyncio.sleep(1)
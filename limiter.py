@@ -0,0 +1,183 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+try:
+    from .common_ import *
+    from .colors import *
+except ImportError:
+    from common_ import *
+    from colors import *
+
+# Lanes, highest priority first
+EXECUTION = 0   # quote, swap, send, confirm
+DETECTION = 1   # getTransaction and friends on the detection path
+ANALYTICS = 2   # supply, Dexscreener
+LANE_NAMES = {EXECUTION: "execution", DETECTION: "detection", ANALYTICS: "analytics"}
+
+
+class LaneStats:
+    """Acquisition and queueing counters for one lane."""
+
+    def __init__(self):
+        self.reset()
+        self.queued = 0
+
+    def reset(self):
+        self.acquired = 0
+        self.waited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait):
+        self.acquired += 1
+        if wait > 0:
+            self.waited += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def snapshot(self):
+        return {
+            "acquired": self.acquired,
+            "queued": self.queued,
+            "saturation": self.waited / self.acquired if self.acquired else 0.0,
+            "avg_wait_ms": self.total_wait / self.waited * 1000 if self.waited else 0.0,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+
+class PriorityRateLimiter:
+    """
+    Token bucket shared by all outbound RPC and HTTP traffic.
+
+    Requests that find the bucket empty wait in a heap ordered by lane, so
+    execution traffic is always served before detection, and detection
+    before analytics. Within a lane waiters are served in arrival order.
+    A waiter cancelled after it was granted gives its tokens back.
+    """
+
+    def __init__(self, rate=RATE_LIMIT_RPS, burst=RATE_LIMIT_BURST, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = float(burst)
+        self.updated = clock()
+        self.waiters = []  # heap of (lane, seq, future, cost)
+        self.seq = itertools.count()
+        self.wakeup = None
+        self.lanes = {lane: LaneStats() for lane in LANE_NAMES}
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, lane=DETECTION, cost=1):
+        """Wait until `cost` tokens are available for `lane`."""
+        cost = min(cost, self.burst)
+        stats = self.lanes[lane]
+        self._refill()
+        if not self.waiters and self.tokens >= cost:
+            self.tokens -= cost
+            stats.record(0.0)
+            return
+
+        started = self.clock()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (lane, next(self.seq), future, cost))
+        stats.queued += 1
+        self._schedule()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted, but cancelled before it could run: hand the tokens to the next waiter
+                self.tokens = min(self.burst, self.tokens + cost)
+                self._schedule()
+            raise
+        finally:
+            stats.queued -= 1
+        stats.record(self.clock() - started)
+
+    def _schedule(self):
+        self._refill()
+        while self.waiters:
+            _, _, future, cost = self.waiters[0]
+            if future.done():
+                heapq.heappop(self.waiters)
+                continue
+            if self.tokens < cost:
+                break
+            heapq.heappop(self.waiters)
+            self.tokens -= cost
+            future.set_result(None)
+
+        if self.waiters and self.wakeup is None:
+            deficit = self.waiters[0][3] - self.tokens
+            self.wakeup = asyncio.get_running_loop().call_later(max(deficit / self.rate, 0.001), self._wake)
+
+    def _wake(self):
+        self.wakeup = None
+        self._schedule()
+
+    def stats(self):
+        return {LANE_NAMES[lane]: stats.snapshot() for lane, stats in self.lanes.items()}
+
+    async def report(self, stop_event, interval=LOG_STATS_INTERVAL):
+        while not stop_event.is_set():
+            await asyncio.sleep(interval)
+            for name, snap in self.stats().items():
+                logging.info(
+                    f"{cc.LIGHT_GRAY}Rate lane {name}: acquired={snap['acquired']} queued={snap['queued']} "
+                    f"saturation={snap['saturation']:.0%} avg_wait={snap['avg_wait_ms']:.1f}ms "
+                    f"max_wait={snap['max_wait_ms']:.1f}ms{cc.RESET}"
+                )
+            for stats in self.lanes.values():
+                stats.reset()
+
+
+if __name__ == "__main__":
+    async def main():
+        # Fake clock: tokens only appear when the test advances time
+        now = [0.0]
+        limiter = PriorityRateLimiter(rate=8, burst=1, clock=lambda: now[0])
+        await limiter.acquire(ANALYTICS)  # Drain the bucket
+        granted = []
+
+        async def request(name, lane):
+            await limiter.acquire(lane)
+            granted.append(name)
+
+        async def tick():
+            now[0] += 0.125  # One token
+            limiter._schedule()
+            for _ in range(3):
+                await asyncio.sleep(0)
+
+        tasks = [asyncio.create_task(request(name, lane)) for name, lane in (
+            ("analytics-1", ANALYTICS), ("detection-1", DETECTION), ("analytics-2", ANALYTICS),
+            ("execution-1", EXECUTION), ("detection-2", DETECTION), ("execution-2", EXECUTION),
+        )]
+        await asyncio.sleep(0)
+        for _ in tasks:
+            await tick()
+        assert granted == ["execution-1", "execution-2", "detection-1", "detection-2", "analytics-1", "analytics-2"], granted
+
+        # A waiter cancelled after its grant returns the token to the next one in line
+        first = asyncio.create_task(request("cancelled", EXECUTION))
+        second = asyncio.create_task(request("next", ANALYTICS))
+        await asyncio.sleep(0)
+        now[0] += 0.125
+        limiter._schedule()  # Grants `first`
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert granted[-1] == "next" and second.done(), granted
+        print("lane order under contention:", ", ".join(granted[:6]))
+        print("token of a cancelled grant went to:", granted[-1])
+        if limiter.wakeup is not None:
+            limiter.wakeup.cancel()
+
+    asyncio.run(main())
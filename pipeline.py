@@ -0,0 +1,203 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+
+try:
+    from .common_ import *
+    from .colors import *
+except ImportError:
+    from common_ import *
+    from colors import *
+
+
+class KeyedLocks:
+    """Per-key locks that are dropped as soon as nobody holds or waits on them."""
+
+    def __init__(self):
+        self.locks = {}  # {key: [asyncio.Lock, users]}
+
+    @asynccontextmanager
+    async def hold(self, key):
+        entry = self.locks.get(key)
+        if entry is None:
+            entry = self.locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                self.locks.pop(key, None)
+
+
+class PipelineStats:
+    """Queue depth and wait time counters for the log consumers."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.processed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.max_depth = 0
+
+    def record(self, wait, depth):
+        self.processed += 1
+        self.total_wait += wait
+        if wait > self.max_wait:
+            self.max_wait = wait
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def snapshot(self):
+        avg_wait = self.total_wait / self.processed if self.processed else 0.0
+        return {
+            "processed": self.processed,
+            "avg_wait_ms": avg_wait * 1000,
+            "max_wait_ms": self.max_wait * 1000,
+            "max_depth": self.max_depth,
+        }
+
+
+class BoundedLogQueue:
+    """
+    Bounded queue of `(received_at, message)` entries with a selectable overflow policy.
+
+    - "drop-oldest": evict the oldest entry to make room for the new one
+    - "drop-newest": discard the incoming entry
+    - "block": make the reader wait until a consumer frees a slot
+
+    Entries older than `max_age` seconds, or more than `max_slot_age` slots
+    behind the newest slot seen, are expired when they reach the front.
+    Backfilled messages (`"backfill": True`) are old by design and only
+    expire by age, which counts from when they were queued.
+    """
+
+    POLICIES = ("drop-oldest", "drop-newest", "block")
+
+    def __init__(self, maxsize=LOG_QUEUE_SIZE, policy=LOG_QUEUE_POLICY, max_age=LOG_MAX_AGE, max_slot_age=LOG_MAX_SLOT_AGE):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        self.queue = asyncio.Queue(maxsize)
+        self.policy = policy
+        self.max_age = max_age
+        self.max_slot_age = max_slot_age
+        self.latest_slot = 0
+        self.dropped = 0
+        self.expired = 0
+        self.max_age_seen = 0.0
+
+    @staticmethod
+    def slot_of(message):
+        return message.get("params", {}).get("result", {}).get("context", {}).get("slot", 0)
+
+    async def put(self, item):
+        slot = self.slot_of(item[1])
+        if slot > self.latest_slot:
+            self.latest_slot = slot
+
+        if self.policy == "block":
+            await self.queue.put(item)
+            return
+        if self.queue.full():
+            self.dropped += 1
+            if self.policy == "drop-newest":
+                return
+            self.queue.get_nowait()
+        self.queue.put_nowait(item)
+
+    async def get(self):
+        while True:
+            item = await self.queue.get()
+            age = time.monotonic() - item[0]
+            if age > self.max_age_seen:
+                self.max_age_seen = age
+            if self.max_age and age > self.max_age:
+                self.expired += 1
+                continue
+            slot = self.slot_of(item[1])
+            if self.max_slot_age and slot and not item[1].get("backfill") and self.latest_slot - slot > self.max_slot_age:
+                self.expired += 1
+                continue
+            return item
+
+    def qsize(self):
+        return self.queue.qsize()
+
+    def stats(self):
+        stats = {
+            "depth": self.queue.qsize(),
+            "dropped": self.dropped,
+            "expired": self.expired,
+            "max_age_ms": self.max_age_seen * 1000,
+        }
+        self.max_age_seen = 0.0
+        return stats
+
+
+class LogWorkerPool:
+    """
+    Runs `handler(message)` for queued logs on a fixed number of concurrent consumers.
+
+    Queue entries are `(received_at, message)` tuples. Messages that share a
+    signature are handled one after another in arrival order; everything else,
+    including messages without a signature, runs concurrently, so a slow
+    transaction only occupies one worker.
+    """
+
+    def __init__(self, logs, handler, workers=LOG_WORKERS, stop_event=None, stats_interval=LOG_STATS_INTERVAL):
+        self.logs = logs
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.stop_event = stop_event or asyncio.Event()
+        self.stats_interval = stats_interval
+        self.locks = KeyedLocks()
+        self.stats = PipelineStats()
+        self.busy = 0
+
+    @staticmethod
+    def signature_of(message):
+        return message.get("params", {}).get("result", {}).get("value", {}).get("signature")
+
+    async def run(self):
+        await asyncio.gather(
+            *(self._worker() for _ in range(self.workers)),
+            self._report(),
+        )
+
+    async def _worker(self):
+        while not self.stop_event.is_set():
+            received_at, message = await self.logs.get()
+            self.stats.record(time.monotonic() - received_at, self.logs.qsize())
+            self.busy += 1
+            try:
+                signature = self.signature_of(message)
+                if signature is None:
+                    await self.handler(message)
+                else:
+                    async with self.locks.hold(signature):
+                        await self.handler(message)
+            except Exception as e:
+                logging.error(f"Error in log worker: {e}")
+            finally:
+                self.busy -= 1
+
+    async def _report(self):
+        while not self.stop_event.is_set():
+            await asyncio.sleep(self.stats_interval)
+            snap = self.stats.snapshot()
+            logging.info(
+                f"{cc.LIGHT_GRAY}Log pipeline: depth={self.logs.qsize()} busy={self.busy}/{self.workers} "
+                f"processed={snap['processed']} avg_wait={snap['avg_wait_ms']:.1f}ms "
+                f"max_wait={snap['max_wait_ms']:.1f}ms max_depth={snap['max_depth']}{cc.RESET}"
+            )
+            self.stats.reset()
+            if isinstance(self.logs, BoundedLogQueue):
+                queue = self.logs.stats()
+                logging.info(
+                    f"{cc.LIGHT_GRAY}Log queue: depth={queue['depth']} dropped={queue['dropped']} "
+                    f"expired={queue['expired']} max_age={queue['max_age_ms']:.1f}ms{cc.RESET}"
+                )
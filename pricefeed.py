@@ -0,0 +1,411 @@
+import asyncio
+import binascii
+import logging
+import re
+import time
+from collections import deque
+
+from base58 import b58decode
+
+try:
+    from .common_ import *
+    from .colors import *
+    from .raycodes import *
+    from .pricing import price_scale, reserve_price, sqrt_price
+    from .derive import amm_v4_keys
+except ImportError:
+    from common_ import *
+    from colors import *
+    from raycodes import *
+    from pricing import price_scale, reserve_price, sqrt_price
+    from derive import amm_v4_keys
+
+# AMM v4 swap direction
+PC2COIN = 1
+COIN2PC = 2
+
+_RAY_LOG = {str: re.compile(r"ray_log: ([A-Za-z0-9+/=]+)"), bytes: re.compile(rb"ray_log: ([A-Za-z0-9+/=]+)")}
+_OK = {str: re.compile(r'"err":\s*null'), bytes: re.compile(rb'"err":\s*null')}
+_PROGRAM_DATA = {str: PROGRAM_DATA, bytes: PROGRAM_DATA.encode()}
+_PROGRAM_LINE = r"Program (\w+) invoke|Program (\w+) (?:success|failed)|Program data: ([A-Za-z0-9+/=]+)"
+_PROGRAM_LINES = {str: re.compile(_PROGRAM_LINE), bytes: re.compile(_PROGRAM_LINE.encode())}
+_SOL_KEY = b58decode(SOL_ADDRESS)
+
+# {program: {discriminator: decoder}} for the Anchor programs whose events are decoded
+EVENT_DECODERS = {RPLMM: CPMM_EVENT_DECODERS, RCLMM: CLMM_EVENT_DECODERS}
+_EVENT_DECODERS = {str: EVENT_DECODERS, bytes: {program.encode(): table for program, table in EVENT_DECODERS.items()}}
+
+
+def decode_events(text):
+    """
+    Yield the CPMM/CLMM Anchor events in a raw frame or a log line list.
+    "Program data:" lines are attributed to the innermost program invoked at that point.
+    """
+    if isinstance(text, list):
+        text = "\n".join(text)
+    kind = type(text)
+    tables, stack = _EVENT_DECODERS[kind], []
+    for match in _PROGRAM_LINES[kind].finditer(text):
+        invoked, returned, payload = match.groups()
+        if invoked is not None:
+            stack.append(invoked)
+        elif returned is not None:
+            if stack:
+                stack.pop()
+        elif stack and stack[-1] in tables:
+            try:
+                event = RaydiumLogParser.parse_event(binascii.a2b_base64(payload), tables[stack[-1]])
+            except Exception:
+                continue
+            if event is not None:
+                yield event
+
+
+class TrackedPool:
+    """Reserve state of one AMM v4 pool priced from the logs stream."""
+
+    __slots__ = ("address", "mint", "sol_is_pc", "coin", "pc", "coin_decimals", "pc_decimals", "swaps", "tracked_at", "matched_at")
+
+    def __init__(self, address, coin, pc, coin_decimals, pc_decimals, now):
+        self.address = address
+        self.mint = None
+        self.sol_is_pc = True
+        self.coin = coin
+        self.pc = pc
+        self.coin_decimals = coin_decimals
+        self.pc_decimals = pc_decimals
+        self.swaps = 0
+        self.tracked_at = now
+        self.matched_at = now  # Last time a record continued the reserve chain
+
+    @property
+    def key(self):
+        return (self.coin, self.pc)
+
+    def price(self):
+        """Fixed-point SOL price of the token."""
+        if self.sol_is_pc:
+            return reserve_price(self.pc, self.coin, price_scale(self.coin_decimals, self.pc_decimals))
+        return reserve_price(self.coin, self.pc, price_scale(self.pc_decimals, self.coin_decimals))
+
+
+class EventPool:
+    """
+    State of one CPMM or CLMM pool priced from its Anchor events.
+    CPMM pools keep raw vault reserves, CLMM pools their sqrt price.
+    """
+
+    __slots__ = ("address", "mint", "sol_is_0", "decimals_0", "decimals_1", "reserve_0", "reserve_1", "sqrt_price_x64", "swaps")
+
+    def __init__(self, address, mint, sol_is_0, decimals_0, decimals_1, reserves=None, sqrt_price_x64=None):
+        self.address = address
+        self.mint = mint
+        self.sol_is_0 = sol_is_0
+        self.decimals_0 = decimals_0
+        self.decimals_1 = decimals_1
+        self.reserve_0, self.reserve_1 = reserves or (None, None)
+        self.sqrt_price_x64 = sqrt_price_x64
+        self.swaps = 0
+
+    @property
+    def priced(self):
+        return bool(self.sqrt_price_x64) or bool(self.reserve_0 and self.reserve_1)
+
+    def price(self):
+        """Fixed-point SOL price of the token, from the sqrt price for CLMM pools and the reserves otherwise."""
+        if self.sol_is_0:
+            scale = price_scale(self.decimals_1, self.decimals_0)
+        else:
+            scale = price_scale(self.decimals_0, self.decimals_1)
+        if self.sqrt_price_x64:
+            return sqrt_price(self.sqrt_price_x64, self.sol_is_0, scale)
+        if self.sol_is_0:
+            return reserve_price(self.reserve_0, self.reserve_1, scale)
+        return reserve_price(self.reserve_1, self.reserve_0, scale)
+
+
+class FeedStats:
+    """Swap matching counters."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.swaps = 0
+        self.events = 0
+        self.exact = 0
+        self.buffered = 0
+        self.ambiguous = 0
+        self.unmatched = 0
+        self.stale = 0
+
+
+class SwapPriceFeed:
+    """
+    Prices pools from the swap records on the program-wide logs stream,
+    without account subscriptions.
+
+    CPMM and CLMM pools are followed through their Anchor events, which name
+    the pool, so matching is a dict lookup on the raw pool key.
+
+    AMM v4 swap logs carry the pool's reserves before the swap but not the pool
+    address, so every tracked pool is indexed by the reserves its next
+    operation will report: the InitLog amounts at first, then the reserves
+    left by each swap, deposit or withdrawal. Only exact matches count; a
+    record whose reserves are shared by several tracked pools (e.g. fresh
+    pump.fun migrations opening in the same state) matches none of them.
+    InitLogs seen in fed frames start tracking their pool right away, so
+    swaps racing the detection path are not lost. Records that match no pool
+    (an untracked pool, or one delivered ahead of the record before it) are
+    kept for PRICE_FEED_BUFFER seconds and applied as soon as a pool reaches
+    their reserves. A pool that has matched nothing for PRICE_FEED_STALE
+    seconds while records kept going unmatched has lost its chain: it is
+    dropped and handed to `on_stale(pool)`. Pools that never get a mint are
+    dropped after SESSION_PRICE_TIMEOUT.
+
+    `on_trade(pool, side, sol_amount)` is called for every matched swap with
+    side "buy"/"sell" relative to the token, and with side None when a pool
+    gets its mint attached.
+    """
+
+    def __init__(self, on_trade, on_stale=None, clock=time.monotonic):
+        self.on_trade = on_trade
+        self.on_stale = on_stale
+        self.clock = clock
+        self.parser = RaydiumLogParser()
+        self.pools = {}         # {amm: TrackedPool}
+        self.by_reserves = {}   # {(coin, pc): {amm, ...}}
+        self.unmatched = {}     # {(coin, pc): (received_at, record)} waiting for a pool to reach those reserves
+        self.unmatched_order = deque()  # (received_at, (coin, pc)), oldest first
+        self.last_unmatched = float("-inf")
+        self.event_pools = {}   # {raw pool key: EventPool}
+        self.stats = FeedStats()
+        self.event_handlers = {
+            CpmmSwapEvent: self._cpmm_swap,
+            CpmmLpChangeEvent: self._cpmm_lp_change,
+            ClmmSwapEvent: self._clmm_swap,
+        }
+
+    def __len__(self):
+        return len(self.pools) + len(self.event_pools)
+
+    def track(self, amm, init):
+        """Start following `amm` from its InitLog record, unless it already is; trades are reported once a mint is attached."""
+        pool = self.pools.get(amm)
+        if pool is not None:
+            return pool
+        pool = TrackedPool(amm, init.coin_amount, init.pc_amount, init.coin_decimals, init.pc_decimals, self.clock())
+        self.pools[amm] = pool
+        self._index(pool)
+        self._drain(pool)
+        return pool
+
+    def attach(self, amm, mint, sol_is_pc=True):
+        pool = self.pools.get(amm)
+        if pool is None:
+            return None
+        pool.mint = mint
+        pool.sol_is_pc = sol_is_pc
+        self.on_trade(pool, None, 0.0)
+        return pool
+
+    def track_pool(self, address, mint, sol_is_0, decimals_0, decimals_1, reserves=None, sqrt_price_x64=None):
+        """Start following a CPMM (`reserves`) or CLMM (`sqrt_price_x64`) pool through its events."""
+        pool = EventPool(address, mint, sol_is_0, decimals_0, decimals_1, reserves, sqrt_price_x64)
+        self.event_pools[b58decode(address)] = pool
+        if pool.priced:
+            self.on_trade(pool, None, 0.0)
+        return pool
+
+    def untrack(self, address):
+        pool = self.pools.pop(address, None)
+        if pool is not None:
+            self._unindex(pool)
+            return
+        self.event_pools.pop(b58decode(address), None)
+
+    def feed(self, frame):
+        """
+        Apply every AMM v4 record and CPMM/CLMM event in a raw logsNotification
+        frame of a successful transaction; an InitLog starts tracking its pool.
+        """
+        kind = type(frame)
+        if _OK[kind].search(frame) is None:
+            return
+        for payload in _RAY_LOG[kind].findall(frame):
+            try:
+                record = self.parser.parse_record(payload)
+            except Exception:
+                continue
+            if record.log_type == LOG_TYPE_INIT:
+                self.track(amm_v4_keys(record.market_pubkey)["amm"], record)
+            else:
+                self.apply(record)
+        if self.event_pools and _PROGRAM_DATA[kind] in frame:
+            for event in decode_events(frame):
+                self.apply_event(event)
+
+    def apply_event(self, event):
+        handler = self.event_handlers.get(type(event))
+        if handler is None:
+            return
+        self.stats.events += 1
+        pool = self.event_pools.get(event.pool)
+        if pool is None:
+            return
+        handler(pool, event)
+
+    def _trade(self, pool, sol_in, sol_amount):
+        pool.swaps += 1
+        self.on_trade(pool, "buy" if sol_in else "sell", sol_amount / 10 ** 9)
+
+    def _cpmm_swap(self, pool, event):
+        if event.input_mint is not None:
+            sol_in = event.input_mint == _SOL_KEY
+        elif pool.reserve_0 and pool.reserve_1:
+            # Older program versions do not name the input mint; pick the side whose reserve it matches
+            sol, token = (pool.reserve_0, pool.reserve_1) if pool.sol_is_0 else (pool.reserve_1, pool.reserve_0)
+            before = event.input_vault_before
+            sol_in = abs(before - sol) / sol <= abs(before - token) / token
+        else:
+            self.stats.unmatched += 1
+            return
+        input_after = event.input_vault_before + event.input_amount
+        output_after = event.output_vault_before - event.output_amount
+        if sol_in == pool.sol_is_0:
+            pool.reserve_0, pool.reserve_1 = input_after, output_after
+        else:
+            pool.reserve_0, pool.reserve_1 = output_after, input_after
+        self._trade(pool, sol_in, event.input_amount if sol_in else event.output_amount)
+
+    def _cpmm_lp_change(self, pool, event):
+        sign = 1 if event.change_type == 0 else -1
+        priced = pool.priced
+        pool.reserve_0 = event.token_0_vault_before + sign * event.token_0_amount
+        pool.reserve_1 = event.token_1_vault_before + sign * event.token_1_amount
+        if not priced:
+            self.on_trade(pool, None, 0.0)
+
+    def _clmm_swap(self, pool, event):
+        pool.sqrt_price_x64 = event.sqrt_price_x64
+        sol_in = event.zero_for_one == pool.sol_is_0
+        self._trade(pool, sol_in, event.amount_0 if pool.sol_is_0 else event.amount_1)
+
+    def _index(self, pool):
+        amms = self.by_reserves.get(pool.key)
+        if amms is None:
+            self.by_reserves[pool.key] = {pool.address}
+        else:
+            amms.add(pool.address)
+
+    def _unindex(self, pool):
+        amms = self.by_reserves.get(pool.key)
+        if amms is not None:
+            amms.discard(pool.address)
+            if not amms:
+                del self.by_reserves[pool.key]
+
+    def _match(self, coin, pc):
+        amms = self.by_reserves.get((coin, pc))
+        if amms is None:
+            self.stats.unmatched += 1
+            return None
+        if len(amms) > 1:
+            self.stats.ambiguous += 1
+            return None
+        self.stats.exact += 1
+        del self.by_reserves[(coin, pc)]
+        return self.pools.get(next(iter(amms)))
+
+    def _buffer(self, key, record):
+        now = self.last_unmatched = self.clock()
+        order, unmatched = self.unmatched_order, self.unmatched
+        cutoff = now - PRICE_FEED_BUFFER
+        while order and (order[0][0] < cutoff or len(order) >= PRICE_FEED_BUFFER_SIZE):
+            received_at, old = order.popleft()
+            entry = unmatched.get(old)
+            if entry is not None and entry[0] == received_at:
+                del unmatched[old]
+        unmatched[key] = (now, record)
+        order.append((now, key))
+
+    def _drain(self, pool):
+        """Apply the buffered records that continue `pool`'s chain from its current reserves."""
+        while pool is not None:
+            entry = self.unmatched.pop(pool.key, None)
+            if entry is None:
+                return
+            self.stats.buffered += 1
+            pool = self._apply(entry[1])
+
+    def apply(self, record):
+        if record.log_type in (LOG_TYPE_SWAP_BASE_IN, LOG_TYPE_SWAP_BASE_OUT):
+            self.stats.swaps += 1
+        self._drain(self._apply(record))
+
+    def _apply(self, record):
+        """Apply one AMM v4 record; returns the pool it moved, or None if it was buffered or ignored."""
+        log_type = record.log_type
+        if log_type == LOG_TYPE_SWAP_BASE_IN:
+            amount_in, amount_out = record.amount_in, record.out_amount
+        elif log_type == LOG_TYPE_SWAP_BASE_OUT:
+            amount_in, amount_out = record.deduct_in, record.amount_out
+        elif log_type not in (LOG_TYPE_DEPOSIT, LOG_TYPE_WITHDRAW):
+            return
+
+        coin, pc = record.pool_coin, record.pool_pc
+        pool = self._match(coin, pc)
+        if pool is None:
+            self._buffer((coin, pc), record)
+            return None
+        pool.matched_at = self.clock()
+        side, sol_amount = None, 0
+        if log_type == LOG_TYPE_DEPOSIT:
+            coin, pc = coin + record.deduct_coin, pc + record.deduct_pc
+        elif log_type == LOG_TYPE_WITHDRAW:
+            coin, pc = coin - record.out_coin, pc - record.out_pc
+        elif record.direction == PC2COIN:
+            coin, pc = coin - amount_out, pc + amount_in
+            side = "buy" if pool.sol_is_pc else "sell"
+            sol_amount = amount_in if pool.sol_is_pc else amount_out
+        elif record.direction == COIN2PC:
+            coin, pc = coin + amount_in, pc - amount_out
+            side = "sell" if pool.sol_is_pc else "buy"
+            sol_amount = amount_out if pool.sol_is_pc else amount_in
+
+        pool.coin, pool.pc = coin, pc
+        self._index(pool)
+        if side is not None:
+            pool.swaps += 1
+            if pool.mint is not None:
+                self.on_trade(pool, side, sol_amount / 10 ** 9)
+        return pool
+
+    def expire(self):
+        """Drop pools that never got a mint and hand the ones whose chain broke to `on_stale`."""
+        now = self.clock()
+        for pool in list(self.pools.values()):
+            if pool.mint is None:
+                if now - pool.tracked_at > SESSION_PRICE_TIMEOUT:
+                    self.untrack(pool.address)
+            elif now - pool.matched_at > PRICE_FEED_STALE and self.last_unmatched > pool.matched_at:
+                self.untrack(pool.address)
+                self.stats.stale += 1
+                if self.on_stale is not None:
+                    self.on_stale(pool)
+
+    async def watch(self, stop_event, interval=1.0):
+        while not stop_event.is_set():
+            await asyncio.sleep(interval)
+            self.expire()
+
+    async def report(self, stop_event, interval=LOG_STATS_INTERVAL):
+        while not stop_event.is_set():
+            await asyncio.sleep(interval)
+            stats = self.stats
+            logging.info(
+                f"{cc.LIGHT_GRAY}Swap feed: pools={len(self)} swaps={stats.swaps} events={stats.events} "
+                f"exact={stats.exact} buffered={stats.buffered} ambiguous={stats.ambiguous} "
+                f"unmatched={stats.unmatched} stale={stats.stale} waiting={len(self.unmatched)}{cc.RESET}"
+            )
+            stats.reset()
@@ -0,0 +1,83 @@
+# Fixed-point prices: the SOL price of one whole token as an int scaled by PRICE_ONE,
+# computed from raw u64 reserves with the SOL side of the pool given explicitly.
+# Floats are produced only at the edges: to_float/to_usd for display, pct_change for strategy thresholds.
+PRICE_DECIMALS = 18
+PRICE_ONE = 10 ** PRICE_DECIMALS
+SOL_DECIMALS = 9
+
+
+def price_scale(token_decimals, sol_decimals=SOL_DECIMALS):
+    """Multiplier turning a raw SOL/token reserve ratio into a fixed-point price."""
+    return 10 ** (PRICE_DECIMALS + token_decimals - sol_decimals)
+
+
+def reserve_price(sol_reserve, token_reserve, scale):
+    """Fixed-point price of a constant-product pool from its raw reserves, 0 if it holds no tokens."""
+    if token_reserve <= 0:
+        return 0
+    return sol_reserve * scale // token_reserve
+
+
+def sqrt_price(sqrt_price_x64, sol_is_0, scale):
+    """Fixed-point price of a concentrated-liquidity pool from its Q64.64 sqrt(token_1 / token_0) price."""
+    if not sqrt_price_x64:
+        return 0
+    ratio = sqrt_price_x64 * sqrt_price_x64  # raw token_1 per token_0, scaled by 2**128
+    if sol_is_0:
+        return (scale << 128) // ratio
+    return ratio * scale >> 128
+
+
+def pct_change(open_price, price):
+    """Percentage change between two fixed-point prices, 0 when there is no reference price."""
+    if not open_price:
+        return 0
+    return (price - open_price) * 100 / open_price
+
+
+def to_float(price):
+    """SOL price of one token as a float."""
+    return price / PRICE_ONE
+
+
+def to_usd(price, sol_price_usd):
+    """USD price of one token as a float."""
+    return price / PRICE_ONE * float(sol_price_usd)
+
+
+if __name__ == "__main__":
+    import timeit
+    from decimal import Decimal
+
+    # 79 SOL against 206.9M tokens with 6 decimals
+    sol_raw, token_raw, decimals = 79_005_078_224, 206_900_000_123_456, 6
+    scale = price_scale(decimals)
+    price = reserve_price(sol_raw, token_raw, scale)
+    assert abs(to_float(price) - (sol_raw / 1e9) / (token_raw / 1e6)) < 1e-18
+    # CLMM: SOL as token_0 (9 decimals) and a 6-decimal token_1 at the same price
+    sqrt_x64 = int(((token_raw / sol_raw) ** 0.5) * 2 ** 64)
+    assert abs(to_float(sqrt_price(sqrt_x64, True, scale)) / to_float(price) - 1) < 1e-9
+    assert abs(to_float(sqrt_price(int(((sol_raw / token_raw) ** 0.5) * 2 ** 64), False, scale)) / to_float(price) - 1) < 1e-9
+    assert pct_change(price, price * 3 // 2) == 50.0
+
+    sol_price_usd = Decimal("180.25")
+    open_ui = 0.000300
+    open_price = reserve_price(int(open_ui * 1e9), 10 ** decimals, scale)
+
+    def float_tick():
+        # Previous hot path: UI floats, ratio flip, Decimal USD and float change
+        pool1, pool2 = sol_raw / 10 ** 9, token_raw / 10 ** decimals
+        new_price = pool1 / pool2 if pool2 > 0 else float("inf")
+        if new_price >= 1:
+            new_price = pool2 / pool1 if pool1 > 0 else float("inf")
+        price_usd = float(Decimal(new_price) * sol_price_usd)
+        return new_price, price_usd, ((new_price - open_ui) / open_ui) * 100
+
+    def fixed_tick():
+        new_price = reserve_price(sol_raw, token_raw, scale)
+        return new_price, pct_change(open_price, new_price)
+
+    rounds = 500_000
+    for name, tick in (("float+Decimal", float_tick), ("fixed-point", fixed_tick)):
+        elapsed = min(timeit.repeat(tick, number=rounds, repeat=3))
+        print(f"{name:>13}: {elapsed / rounds * 1e9:6.0f} ns/tick")
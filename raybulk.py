@@ -0,0 +1,212 @@
+import binascii
+
+import numpy as np
+
+try:
+    from .raycodes import *
+except ImportError:
+    from raycodes import *
+
+# Packed dtypes mirroring the bincode layouts in raycodes; u128 fields are split into lo/hi u64 columns
+INIT_DTYPE = np.dtype([
+    ("log_type", "u1"), ("time", "<u8"), ("pc_decimals", "u1"), ("coin_decimals", "u1"),
+    ("pc_lot_size", "<u8"), ("coin_lot_size", "<u8"), ("pc_amount", "<u8"), ("coin_amount", "<u8"),
+    ("market", "u1", (32,)),
+])
+DEPOSIT_DTYPE = np.dtype([
+    ("log_type", "u1"), ("max_coin", "<u8"), ("max_pc", "<u8"), ("base", "<u8"),
+    ("pool_coin", "<u8"), ("pool_pc", "<u8"), ("pool_lp", "<u8"),
+    ("calc_pnl_x_lo", "<u8"), ("calc_pnl_x_hi", "<u8"), ("calc_pnl_y_lo", "<u8"), ("calc_pnl_y_hi", "<u8"),
+    ("deduct_coin", "<u8"), ("deduct_pc", "<u8"), ("mint_lp", "<u8"),
+])
+WITHDRAW_DTYPE = np.dtype([
+    ("log_type", "u1"), ("withdraw_lp", "<u8"), ("user_lp", "<u8"),
+    ("pool_coin", "<u8"), ("pool_pc", "<u8"), ("pool_lp", "<u8"),
+    ("calc_pnl_x_lo", "<u8"), ("calc_pnl_x_hi", "<u8"), ("calc_pnl_y_lo", "<u8"), ("calc_pnl_y_hi", "<u8"),
+    ("out_coin", "<u8"), ("out_pc", "<u8"),
+])
+SWAP_BASE_IN_DTYPE = np.dtype([
+    ("log_type", "u1"), ("amount_in", "<u8"), ("minimum_out", "<u8"), ("direction", "<u8"),
+    ("user_source", "<u8"), ("pool_coin", "<u8"), ("pool_pc", "<u8"), ("out_amount", "<u8"),
+])
+SWAP_BASE_OUT_DTYPE = np.dtype([
+    ("log_type", "u1"), ("max_in", "<u8"), ("amount_out", "<u8"), ("direction", "<u8"),
+    ("user_source", "<u8"), ("pool_coin", "<u8"), ("pool_pc", "<u8"), ("deduct_in", "<u8"),
+])
+
+LOG_DTYPES = {
+    LOG_TYPE_INIT: INIT_DTYPE,
+    LOG_TYPE_DEPOSIT: DEPOSIT_DTYPE,
+    LOG_TYPE_WITHDRAW: WITHDRAW_DTYPE,
+    LOG_TYPE_SWAP_BASE_IN: SWAP_BASE_IN_DTYPE,
+    LOG_TYPE_SWAP_BASE_OUT: SWAP_BASE_OUT_DTYPE,
+}
+
+for _layout, _dtype in ((INIT_LOG, INIT_DTYPE), (DEPOSIT_LOG, DEPOSIT_DTYPE), (WITHDRAW_LOG, WITHDRAW_DTYPE), (SWAP_LOG, SWAP_BASE_IN_DTYPE), (SWAP_LOG, SWAP_BASE_OUT_DTYPE)):
+    assert _layout.size == _dtype.itemsize, (_layout.format, _dtype)
+
+
+def _decode_each(payloads):
+    chunks = []
+    for payload in payloads:
+        try:
+            chunks.append(binascii.a2b_base64(payload))
+        except (binascii.Error, ValueError):
+            chunks.append(b"")
+    return chunks
+
+
+def _decode_joined(blob):
+    """Decode a concatenation of unpadded payloads, or None if any of them was malformed."""
+    try:
+        data = binascii.a2b_base64(blob)
+    except (binascii.Error, ValueError):
+        return None
+    return data if len(data) == len(blob) // 4 * 3 else None
+
+
+def _decode_payloads(payloads):
+    """
+    Base64-decode a batch into one contiguous buffer.
+    Returns (buffer, start offset of each payload, decoded size of each payload).
+
+    Unpadded payloads (every length a multiple of 4, no "=") are joined and
+    decoded in a single call; padded or malformed ones are decoded one by one
+    and appended after them.
+    """
+    # a2b_base64 takes ASCII str directly, so str batches are never re-encoded
+    pad = "=" if isinstance(payloads[0], str) else b"="
+    part = "".join if isinstance(payloads[0], str) else b"".join
+    blob = part(payloads)
+    lengths = np.fromiter(map(len, payloads), dtype=np.int64, count=len(payloads))
+    ends = np.cumsum(lengths)
+    clean = (lengths > 0) & (lengths % 4 == 0)
+    if pad in blob:
+        clean &= ~np.fromiter((payload.endswith(pad) for payload in payloads), dtype=bool, count=len(payloads))
+
+    sizes = np.zeros(len(lengths), dtype=np.int64)
+    if clean.all():
+        data = _decode_joined(blob)
+        if data is not None:
+            sizes = lengths // 4 * 3
+            return data, ends // 4 * 3 - sizes, sizes
+        clean[:] = False
+    elif clean.any():
+        index = np.flatnonzero(clean)
+        chunk = part([payloads[i] for i in index])
+        data = _decode_joined(chunk)
+        if data is None:
+            clean[:] = False
+    if not clean.any():
+        data = b""
+
+    sizes[clean] = lengths[clean] // 4 * 3
+    rest = np.flatnonzero(~clean)
+    chunks = _decode_each([payloads[i] for i in rest])
+    sizes[rest] = np.fromiter(map(len, chunks), dtype=np.int64, count=len(chunks))
+    # Clean payloads occupy the start of the buffer in input order, the rest follow
+    order = np.concatenate([np.flatnonzero(clean), rest])
+    starts = np.empty(len(sizes), dtype=np.int64)
+    starts[order] = np.concatenate([[0], np.cumsum(sizes[order])[:-1]])
+    return data + b"".join(chunks), starts, sizes
+
+
+def decode_ray_logs(payloads, return_index=False):
+    """
+    Decode a batch of base64 `ray_log` payloads into one structured array per log type.
+
+    The batch is decoded into a single buffer, which is then viewed as a
+    record starting at every byte for each log type's dtype, so selecting the
+    payload offsets of that type copies each record exactly once. Empty,
+    truncated and unknown payloads are skipped. Rows keep their input order;
+    with `return_index=True` a second dict maps each log type to the input
+    positions of its rows.
+    """
+    if not len(payloads):
+        return ({}, {}) if return_index else {}
+    data, starts, sizes = _decode_payloads(payloads)
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    present = sizes > 0
+    log_types = np.full(len(sizes), 255, dtype=np.uint8)
+    log_types[present] = buffer[starts[present]]
+
+    arrays, indexes = {}, {}
+    for log_type, dtype in LOG_DTYPES.items():
+        if len(buffer) < dtype.itemsize:
+            continue
+        index = np.flatnonzero((log_types == log_type) & (sizes >= dtype.itemsize))
+        if not len(index):
+            continue
+        view = np.ndarray((len(buffer) - dtype.itemsize + 1,), dtype, buffer, 0, (1,))
+        arrays[log_type] = view[starts[index]]
+        indexes[log_type] = index
+    return (arrays, indexes) if return_index else arrays
+
+
+def u128_values(records: np.ndarray, field: str) -> np.ndarray:
+    """Exact u128 values of a split `<field>_lo`/`<field>_hi` column as a Python-int object array."""
+    return records[f"{field}_lo"].astype(object) + (records[f"{field}_hi"].astype(object) << 64)
+
+
+def u128_float(records: np.ndarray, field: str) -> np.ndarray:
+    """Approximate u128 values of a split column as float64, for vectorized analytics."""
+    return records[f"{field}_lo"].astype(np.float64) + records[f"{field}_hi"].astype(np.float64) * 2.0 ** 64
+
+
+if __name__ == "__main__":
+    import base64
+    import random
+    import time
+
+    parser = RaydiumLogParser()
+    init = "AASmgmcAAAAACQaghgEAAAAAAEBCDwAAAAAAAMqaOwAAAAAAID2IeS0AAHEqcnpabbIF4M/QaJoHlIeLkFBa0VgTlDKIcH5MM0Vi"
+    rng = random.Random(7)
+
+    def u64():
+        return rng.getrandbits(64)
+
+    templates = [init] + [
+        base64.b64encode(SWAP_LOG.pack(rng.choice((LOG_TYPE_SWAP_BASE_IN, LOG_TYPE_SWAP_BASE_OUT)), *(u64() for _ in range(7)))).decode()
+        for _ in range(200)
+    ] + [
+        base64.b64encode(DEPOSIT_LOG.pack(LOG_TYPE_DEPOSIT, *(u64() for _ in range(13)))).decode() for _ in range(20)
+    ] + [
+        base64.b64encode(WITHDRAW_LOG.pack(LOG_TYPE_WITHDRAW, *(u64() for _ in range(11)))).decode() for _ in range(20)
+    ]
+
+    # Correctness against the scalar record parser
+    arrays, indexes = decode_ray_logs(templates, return_index=True)
+    for log_type, records in arrays.items():
+        for row, position in zip(records, indexes[log_type]):
+            expected = parser.parse_record(templates[position])
+            for field in expected._fields:
+                if field in ("calc_pnl_x", "calc_pnl_y"):
+                    got = int(row[f"{field}_lo"]) | int(row[f"{field}_hi"]) << 64
+                elif field == "market":
+                    got = bytes(row[field])
+                else:
+                    got = int(row[field])
+                assert got == getattr(expected, field), (log_type, field)
+        if "calc_pnl_x_lo" in records.dtype.names:
+            assert list(u128_values(records, "calc_pnl_x")) == [parser.parse_record(templates[p]).calc_pnl_x for p in indexes[log_type]]
+    print({log_type: len(records) for log_type, records in arrays.items()})
+
+    payloads = [rng.choice(templates) for _ in range(1_000_000)]
+    started = time.perf_counter()
+    arrays = decode_ray_logs(payloads)
+    elapsed = time.perf_counter() - started
+    print(f"bulk:   {len(payloads) / elapsed:,.0f} events/s ({sum(map(len, arrays.values())):,} decoded)")
+
+    # Swap-only batches are the common case and carry the shortest payloads
+    swaps = [rng.choice(templates[1:201]) for _ in range(1_000_000)]
+    started = time.perf_counter()
+    decode_ray_logs(swaps)
+    elapsed = time.perf_counter() - started
+    print(f"swaps:  {len(swaps) / elapsed:,.0f} events/s")
+
+    sample = payloads[:100_000]
+    started = time.perf_counter()
+    for payload in sample:
+        parser.parse_record(payload)
+    elapsed = time.perf_counter() - started
+    print(f"record: {len(sample) / elapsed:,.0f} events/s")
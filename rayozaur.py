@@ -1,10 +1,7 @@
-import websockets
 import asyncio
 import json
 import logging
-import aiohttp
 import traceback
-from collections import defaultdict
 import signal
 
 import time
@@ -16,6 +13,20 @@ try:
     from .swaps import *
     from .utils import *
     from .dexscreener import AsyncDex
+    from .subscriptions import AccountSubscriptionPool
+    from .ingest import LogIngestor
+    from .pipeline import LogWorkerPool, BoundedLogQueue
+    from .derive import amm_v4_keys, find_pool_keys, vault_for, sort_mints
+    from .rpc import RpcBatcher
+    from .retry import RetryScheduler
+    from .cache import MetadataCache
+    from .limiter import PriorityRateLimiter, DETECTION
+    from .connections import ConnectionPools
+    from .pricefeed import SwapPriceFeed, decode_events
+    from .spl import decode_token_account
+    from .series import PoolSeries
+    from .pricing import price_scale, reserve_price, pct_change, to_float, to_usd
+    from .sessions import SessionEngine
 except ImportError:
     from raycodes import *
     from common_ import *
@@ -23,6 +34,20 @@ except ImportError:
     from swaps import *
     from utils import *
     from dexscreener import AsyncDex
+    from subscriptions import AccountSubscriptionPool
+    from ingest import LogIngestor
+    from pipeline import LogWorkerPool, BoundedLogQueue
+    from derive import amm_v4_keys, find_pool_keys, vault_for, sort_mints
+    from rpc import RpcBatcher
+    from retry import RetryScheduler
+    from cache import MetadataCache
+    from limiter import PriorityRateLimiter, DETECTION
+    from connections import ConnectionPools
+    from pricefeed import SwapPriceFeed, decode_events
+    from spl import decode_token_account
+    from series import PoolSeries
+    from pricing import price_scale, reserve_price, pct_change, to_float, to_usd
+    from sessions import SessionEngine
 
 cc = ColorCodes()
 
@@ -31,6 +56,8 @@ logging.basicConfig(
     level=logging.INFO,
 )
 
+IGNORED_MINTS = ["So11111111111111111111111111111111111111112", "ATokenGPvbdGVxr1b2hvZbsiqW5xWH25efTNsLJA8knL", "TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb"]
+
 async def intro():
     print(fr"""{cc.CYAN}{cc.BRIGHT}
 {cc.CYAN} ______                                                {cc.LIGHT_BLUE}______          
@@ -48,19 +75,30 @@ async def intro():
 
 class DexBetterLogs:
     def __init__(self, rpc_endpoint):
-        self.logs = asyncio.Queue()
-        self.session = aiohttp.ClientSession()
+        self.logs = BoundedLogQueue(LOG_QUEUE_SIZE, LOG_QUEUE_POLICY, LOG_MAX_AGE, LOG_MAX_SLOT_AGE)
+        self.limiter = PriorityRateLimiter(RATE_LIMIT_RPS, RATE_LIMIT_BURST)
+        self.http = ConnectionPools(HTTP_POOL_LIMIT, HTTP_POOL_PER_HOST, HTTP_KEEPALIVE, HTTP_DNS_TTL, self.limiter)
+        self.session = self.http.session
+        self.rpc = RpcBatcher(self.session, RPC_URL, RPC_BATCH_WINDOW, RPC_BATCH_MAX, self.limiter)
         self.rpc_endpoint = rpc_endpoint
         self.stop_event = asyncio.Event()
-        self.balances = defaultdict(lambda: defaultdict(dict))
-        self.subscriptions = {}  # {address: WebSocket object}
-        self.mint_data = {}
-        self.single_lock = True
+        self.balances = {}  # {mint: PoolSeries}
+        self.subscriptions = {}  # {address: mint}
+        self.sol_is_pc = {}  # {mint: whether SOL is the pc side of its AMM v4 pool}
+        self.account_pool = AccountSubscriptionPool(WS_URL, ACCOUNT_WS_CONNECTIONS, self.stop_event, {"encoding": ACCOUNT_ENCODING, "commitment": "processed"})
+        self.vaults = {}  # {token account: (holds SOL, decimals of its mint)}
+        self.engine = SessionEngine(MAX_SESSIONS, MAX_OPEN_POSITIONS, MAX_EXPOSURE_USD)
         self.active_sessions, self.blacklist, self.active_tasks = set(), set(), set()
         self.pools = {}
-        self.dexscreen = AsyncDex(self.session)
+        self.dexscreen = AsyncDex(self.session, self.limiter)
         self.boosted_mints = {}
-        self.creators = {}
+        self.cache = MetadataCache(CACHE_PATH)
+        self.creators = self.cache.creators
+        self.rpc_slots = asyncio.Semaphore(MAX_INFLIGHT_RPC)
+        self.retries = RetryScheduler(self.stop_event)
+        self.ray_parser = RaydiumLogParser()
+        self.price_feed = SwapPriceFeed(self.on_swap_trade, self.on_swap_stale)
+        self.price_feed_mode = PRICE_FEED
 
     def load_blacklist(self):
         try:
@@ -101,6 +139,13 @@ class DexBetterLogs:
         except Exception as e:
             logging.error(f"Error saving to blacklist: {e}")
 
+    def blacklist_creator(self, creator):
+        """Stop buying tokens of `creator` and persist it."""
+        if creator in self.blacklist:
+            return
+        self.blacklist.add(creator)
+        self.save_to_blacklist(creator)
+
     def setup_signal_handlers(self):
         """Setup signal handlers for graceful shutdown."""
         signal.signal(signal.SIGINT, self.handle_exit)   # Ctrl+C
@@ -109,151 +154,99 @@ class DexBetterLogs:
     def handle_exit(self, signum, frame):
         """Signal handler for termination."""
         logging.info(f"Signal {signum} received. Shutting down gracefully...")
+        self.cache.save()
         self.stop_event.set()
         time.sleep(1)
         sys.exit(0)
             
-    async def subscribe_logs(self, program=RLQ4):
-        """Subscribe to logs for the specified program."""
-        while not self.stop_event.is_set():
+    async def subscribe_logs(self, programs=LOG_PROGRAMS, endpoints=LOG_WS_ENDPOINTS):
+        """Subscribe to logs for all specified programs on every endpoint and merge them into self.logs."""
+        swap_sink = self.price_feed if self.price_feed_mode == "logs" else None
+        self.ingestor = LogIngestor(self.logs, self.stop_event, programs, endpoints, self.rpc, swap_sink)
+        await self.ingestor.run()
+
+    async def subscribe_to_account(self, address, mint, role=None):
+        """
+        Subscribe to updates for a specific account over the shared account pool.
+        `mint` may be a future when the pool was detected before its mint was known;
+        updates are held back until it resolves.
+        """
+        async def on_update(data):
+            nonlocal mint
+            if asyncio.isfuture(mint):
+                mint = await mint
+                if mint is None:
+                    await self.unsubscribe_from_account(address)
+                    return
+                self.subscriptions[address] = mint
             try:
-                async with websockets.connect(
-                    WS_URL,
-                    ping_interval=15,
-                    ping_timeout=60,
-                    max_size=10**6,
-                ) as ws:
-                    # Send subscription request
-                    await ws.send(json.dumps({
-                        "jsonrpc": "2.0",
-                        "method": "logsSubscribe",
-                        "params": [{"mentions": [program]}, {"commitment": "processed"}],
-                        "id": program,
-                    }))
-
-                    response = json.loads(await ws.recv())
-                    if 'result' in response:
-                        logging.info(f"Response: {response}")
-                        logging.info(f"Subscribed to logs for program {program}")
-                    else:
-                        logging.warning(f"Unexpected response: {response}")
-                        continue
-
-                    # Process incoming messages
-                    while not self.stop_event.is_set():
-                        try:
-                            message = await ws.recv()
-                            hMessage = json.loads(message)
-                            await self.logs.put(hMessage)
-                        except json.JSONDecodeError as e:
-                            logging.warning(f"JSON decode error, ignoring message: {e}")
-                            continue
-                        except asyncio.exceptions.IncompleteReadError as e:
-                            logging.warning(f"Incomplete message read, ignoring: {e}")
-                            continue
-                        except websockets.exceptions.ConnectionClosedError as e:
-                            logging.warning(f"Connection unexpectedly closed: {e}")
-                            break
-                        except Exception as e:
-                            logging.error(f"Unexpected error while receiving message: {e}")
-                            continue
-
-            except websockets.exceptions.ConnectionClosedError as e:
-                logging.warning(f"Connection closed unexpectedly during setup: {e}. Retrying...")
+                if "result" in data or "params" in data:
+                    await self.handle_account_update(data, address, mint, role)
             except Exception as e:
-                logging.error(f"Unexpected error in logs subscription: {e}")
-                traceback.print_exc()
-
-            finally:
-                logging.info("Reconnecting in 1 second...")
-                await asyncio.sleep(1)
+                logging.error(f"Error in account subscription for {address}: {e}")
+                if mint in self.pools and self.pools.get(mint, {}).get("sold") is False:
+                    self.pools[mint]["sold"] = True
+            if mint in self.pools and self.pools.get(mint, {}).get("sold") is True:
+                logging.info(f"Unsubscribing due to sell order: {address}")
+                await self.unsubscribe_from_account(address)
 
-    async def subscribe_to_account(self, address, mint, role=None):
-        """Subscribe to updates for a specific account"""
         try:
-            async def account_subscription_task():
-                async with websockets.connect(WS_URL, ping_interval=1, ping_timeout=15, max_size=10**6) as ws:
-                    self.subscriptions[address] = ws
-                    await ws.send(json.dumps({
-                        "jsonrpc": "2.0",
-                        "method": "accountSubscribe",
-                        "params": [address, {"encoding": "jsonParsed", "commitment": "processed"}],
-                        "id": address,
-                    }))
-                    await ws.recv()  # Acknowledge subscription
-                    logging.info(f"Subscribed to account {address} as {role}")
-
-                    while not self.stop_event.is_set():
-                        try:
-                            message = await asyncio.wait_for(ws.recv(), timeout=60)
-                            data = json.loads(message)
-                            if "result" in data or "params" in data:
-                                result = await self.handle_account_update(data, address, mint, role)
-                                if mint in self.pools and self.pools.get(mint, {}).get("sold") is True:
-                                    logging.info(f"Unsubscribing due to sell order: {address}")
-                                    self.subscriptions.pop(address, None)
-                                    break
-                        except asyncio.TimeoutError:
-                            await ws.ping()
-                        except AttributeError as e:
-                            logging.error(f"Attribute error: {e}")
-                            if mint in self.pools and self.pools.get(mint, {}).get("sold") is False:
-                                self.pools[mint]["sold"] = True
-                            self.subscriptions.pop(address, None)
-                            break
-                        except Exception as e:
-                            logging.error(f"Error in account subscription for {address}: {e}")
-                            if mint in self.pools and self.pools.get(mint, {}).get("sold") is False:
-                                self.pools[mint]["sold"] = True
-                            break
-
-            asyncio.create_task(account_subscription_task())
-
+            self.subscriptions[address] = mint
+            if await self.account_pool.subscribe(address, on_update) is False:
+                self.subscriptions.pop(address, None)
+                return
+            logging.info(f"Subscribed to account {address} as {role}")
         except Exception as e:
+            self.subscriptions.pop(address, None)
             logging.error(f"Subscription failed for {address}: {e}")
 
-    async def buy(self, lp_id, trust_level):
-        """Buy Raydium tokens"""
-        amount = await usd_to_lamports(1, self.swaps.sol_price_usd) if trust_level == 1 else await usd_to_lamports(1, self.swaps.sol_price_usd)
-        fee = await usd_to_lamports(0.07, self.swaps.sol_price_usd)
-        if self.dev_balance <= amount + fee:
-            logging.info(f"Insufficient balance: {self.dev_balance}")
-            return
+    async def buy(self, lp_id, trust_level, amount, fee):
+        """
+        Buy Raydium tokens for `amount` lamports; the balance check is done when open_position reserves them.
+        Returns the token balance, None if the buy failed on chain, or "Unconfirmed" if it may still land.
+        """
         ray_tx = await self.swaps.send_ws_transaction(lp_id, amount, fee)
         if ray_tx == "QuoteUnavailable":
             return "QuoteUnavailable"
         logging.info(f"Raydium buy order: {ray_tx}")
         result = await self.swaps.get_swap_tx(ray_tx, lp_id)
-        # if result == "InstructionError":
-        #     return await self.buy(lp_id, trust_level)
         await self.save_result({"timestamp": time.time(), "buy": result, "amount": amount, "fee": fee, "mint": lp_id, "trust_level": trust_level})
-        token_amount = result.get("balance", 0)
-        return token_amount
+        if result == "tx_fail":
+            logging.warning(f"Buy of {lp_id} not confirmed within {SWAP_CONFIRM_DEADLINE}s")
+            return "Unconfirmed"
+        if not isinstance(result, dict):  # "InstructionError": the transaction failed on chain
+            return None
+        return result.get("balance", 0)
     
     async def sell(self, lp_id, amount, our_change_pct):
-        """Sell Raydium tokens"""
+        """Sell Raydium tokens; returns the confirmed result, or None if the sell did not go through."""
         fee = await usd_to_lamports(0.1, self.swaps.sol_price_usd)
         ray_tx = await self.swaps.send_ws_transaction(lp_id, amount, fee, tx_type="sell")
         logging.info(f"Raydium sell order: {ray_tx}")
         result = await self.swaps.get_swap_tx(ray_tx, lp_id, tx_type="sell")
 
         if lp_id in self.creators and our_change_pct <= -25:
-            await self.save_to_blacklist(self.creators[lp_id])
-            self.blacklist.add(self.creators[lp_id])
-        if result:
-            self.dev_balance = result.get("balance", 0)
-            await self.save_result({"timestamp": time.time(), "sell": result, "amount": amount, "fee": fee, "mint": lp_id, "change_pct": our_change_pct})
-        else:
-            return
+            self.blacklist_creator(self.creators[lp_id])
+        if not isinstance(result, dict):
+            return None
+        self.engine.sold(lp_id)
+        self.engine.set_wallet(result.get("balance", 0))
+        await self.save_result({"timestamp": time.time(), "sell": result, "amount": amount, "fee": fee, "mint": lp_id, "change_pct": our_change_pct})
+        return result
         
     async def handle_account_update(self, data, address, mint, role):
         try:
             token_data = data.get("params", {}).get("result", {})
             if token_data:
                 timestamp = time.time()
-                token_balance = token_data.get("value", {}).get("data", {}).get("parsed", {}).get("info", {}).get("tokenAmount", {}).get("uiAmount", 0)
+                token_balance = await self.vault_amount(address, token_data.get("value", {}))
+                if token_balance is None or self.pools.get(mint, {}).get("sold"):
+                    return
 
-                self.balances[mint][role][timestamp] = token_balance
+                balances = self.balances.get(mint)
+                if balances is None:
+                    balances = self.balances[mint] = PoolSeries(SERIES_CAPACITY)
+                balances.role(role).append(timestamp, token_balance)
 
                 if mint not in self.pools:
                     self.pools[mint] = {"pool1": None, "pool2": None, "sold": False}
@@ -263,34 +256,9 @@ class DexBetterLogs:
                     self.pools[mint]["pool2"] = address
 
                 # We have balances for both pools => We can calculate a price
-                if self.balances[mint].get("pool1") and self.balances[mint].get("pool2"):
-                    if mint in self.pools and self.pools[mint].get("pool1") and self.pools[mint].get("pool2"):
-                        pool1_balance = list(self.balances[mint].get("pool1", {}).values())[-1]
-                        pool2_balance = list(self.balances[mint].get("pool2", {}).values())[-1]
-
-                        if pool1_balance is not None and pool2_balance is not None:
-                            new_price = self.calculate_price(pool1_balance, pool2_balance)
-                            price_usd = float(Decimal(new_price) * self.swaps.sol_price_usd)
-
-                            if mint not in self.active_sessions:
-                                self.active_sessions.add(mint)
-                                lp1 = self.pools[mint].get("pool1")
-                                lp2 = self.pools[mint].get("pool2")
-                                start_price = new_price
-                                real_supply = await self.swaps.get_token_supply(mint)
-                                asyncio.create_task(self.session_tracker(mint, lp1, lp2, start_price, timestamp, real_supply))
-                            else:
-                                if mint in self.mint_data:
-                                    if new_price != self.mint_data[mint]["price"]:
-                                        if new_price > self.mint_data[mint]["price"]:
-                                            self.mint_data[mint]["volume"]["buy"] += 1
-                                        elif new_price < self.mint_data[mint]["price"]:
-                                            self.mint_data[mint]["volume"]["sell"] += 1
-                                        self.mint_data[mint]["price"] = new_price
-                                        self.mint_data[mint]["price_usd"] = price_usd
-                                    else:
-                                        await asyncio.sleep(0.02)
-                                        return
+                latest = balances.latest()
+                if latest is not None and self.pools[mint].get("pool1") and self.pools[mint].get("pool2"):
+                    self.update_price(mint, self.vault_price(mint, *latest), timestamp)
 
         except AttributeError:
             logging.error(f"Unknown structure for {address}, stopping the tracker...")
@@ -300,177 +268,277 @@ class DexBetterLogs:
             logging.error(f"Error processing account update for {address}: {e}")
             traceback.print_exc()
 
-    async def session_tracker(self, mint, lp1, lp2, start_price, timestamp, supply):
-        last_price = 0
-        momentum = float(0.00)
-        current_step = 40
-        last_price_change = time.time()
-        time_since_buy = None
-        session_meta = {"bought": False, "sold": False, "stagnant": False}
-        iterations = 0
-        our_change_pct = 0
-        market_cap = 0
-        balance = 0
-        change_pct = 0
-        peak_change = 0
-        pct_diff = []
-        last_logged_time = time.time()
-        prev_change_pct = 0
+    async def vault_amount(self, address, value):
+        """Raw amount of a token account notification, for either subscription encoding.
+        The first notification of each vault records whether it holds SOL and its mint's decimals."""
+        data = value.get("data")
+        if isinstance(data, list):
+            # ["<base64>", "base64"]: exact u64 amount at a fixed offset
+            mint_key, _, amount = decode_token_account(data[0])
+            if address not in self.vaults:
+                vault_mint = base58.b58encode(mint_key).decode()
+                decimals = await self.token_decimals(vault_mint)
+                if decimals is None:
+                    return None
+                self.vaults[address] = (vault_mint == SOL_ADDRESS, decimals)
+            return amount
+        info = data.get("parsed", {}).get("info", {})
+        token_amount = info.get("tokenAmount", {})
+        if address not in self.vaults:
+            self.vaults[address] = (info.get("mint") == SOL_ADDRESS, token_amount.get("decimals", 0))
+        return int(token_amount.get("amount", 0))
+
+    def vault_price(self, mint, pool1_amount, pool2_amount):
+        """Fixed-point SOL price of `mint` from the raw amounts of its two vaults, 0 until both are known."""
+        vault1 = self.vaults.get(self.pools[mint]["pool1"])
+        vault2 = self.vaults.get(self.pools[mint]["pool2"])
+        if vault1 is None or vault2 is None:
+            return 0
+        if vault1[0]:
+            return reserve_price(pool1_amount, pool2_amount, price_scale(vault2[1], vault1[1]))
+        if vault2[0]:
+            return reserve_price(pool2_amount, pool1_amount, price_scale(vault1[1], vault2[1]))
+        return 0
+
+    def update_price(self, mint, new_price, timestamp, side=None, sol_amount=0.0):
+        """
+        Apply a new fixed-point price for `mint`, starting its session on the first one.
+        `side` ("buy"/"sell") and `sol_amount` describe the trade when it is known
+        from a swap log; otherwise the trade side is inferred from the price move.
+        """
+        if new_price <= 0:
+            return
+        if mint not in self.active_sessions:
+            self.active_sessions.add(mint)
+            state = self.engine.open(mint, new_price, timestamp)
+            asyncio.create_task(self.start_session(state))
+            return
+        state = self.engine.get(mint)
+        if state is not None:
+            state.tick(new_price, timestamp, side, sol_amount)
+
+    def claim_session(self, mint):
+        """Hold a MAX_SESSIONS slot for a detected pool; it is given back if no price arrives in time."""
+        if not self.engine.claim(mint):
+            logging.info(f"Session limit reached, not tracking {mint}")
+            return False
+        asyncio.get_running_loop().call_later(SESSION_PRICE_TIMEOUT, self.expire_claim, mint)
+        return True
+
+    def expire_claim(self, mint):
+        if self.engine.unclaim(mint):
+            logging.info(f"No price for {mint} within {SESSION_PRICE_TIMEOUT}s, dropping it")
+            self.pools.setdefault(mint, {"pool1": None, "pool2": None, "sold": False})["sold"] = True
+            asyncio.create_task(self.release_pools(mint))
+            # Vaults that never reported are not in self.pools; their subscription may still hold the mint future
+            for address, owner in list(self.subscriptions.items()):
+                if asyncio.isfuture(owner):
+                    owner = owner.result() if owner.done() and not owner.cancelled() and owner.exception() is None else None
+                if owner == mint:
+                    asyncio.create_task(self.unsubscribe_from_account(address))
+
+    async def start_session(self, state):
+        state.supply = await self.swaps.get_token_supply(state.mint)
+        await self.session_tracker(state)
+
+    def on_swap_trade(self, pool, side, sol_amount):
+        """Price-feed callback: push the pool's reserves after a swap into its session."""
+        if self.pools.get(pool.mint, {}).get("sold"):
+            self.price_feed.untrack(pool.address)
+            return
+        self.update_price(pool.mint, pool.price(), time.time(), side, sol_amount)
+
+    def on_swap_stale(self, pool):
+        """Price-feed callback: the swap logs of `pool` stopped matching its reserves, so follow its vaults instead."""
+        entry = self.pools.get(pool.mint)
+        if entry is None or entry["sold"]:
+            return
+        entry.pop("feed", None)
+        logging.info(f"Swap logs of {pool.mint} lost track of its reserves, subscribing to its vaults")
+        asyncio.create_task(self.manage_subscriptions(entry["pool1"], entry["pool2"], pool.mint))
+
+    async def session_tracker(self, state):
+        """Evaluate every new price of `state` in arrival order until the session ends."""
+        mint = state.mint
+        changed, pending = state.changed, state.pending
+        indicators = state.indicators
+        flow = indicators.flow
         while not self.stop_event.is_set():
             try:
-                iterations += 1
-
-                # Mint data dict
-                if mint not in self.mint_data:
-                    self.mint_data[mint] = {
-                        "price_history": [],
-                        "price": start_price,
-                        "price_usd": 0,
-                        "balance": 0,
-                        "our_peak_price": 0,
-                        "timestamp": timestamp,
-                        "open_price": start_price,
-                        "volume": {"buy": 0, "sell": 0},
-                    }
-
-                price_len = len(self.mint_data[mint].get("price_history", []))
-                new_price = self.mint_data[mint].get("price")
-                price_usd = self.mint_data[mint].get("price_usd", 0)
-                volume = self.mint_data[mint].get("volume")
-
-                if time.time() - last_price_change >= 30:
-                    session_meta["stagnant"] = True
-                    if session_meta["bought"] and not session_meta["sold"]:
-                        await self.sell(mint, self.mint_data[mint].get("balance"), our_change_pct)
-                        logging.info(f"Sold {mint} at {new_price}")
-                        self.pools[mint]["sold"] = True
-                    break
-
-                if new_price == last_price:
-                    await asyncio.sleep(0.1)
+                if not pending:
+                    changed.clear()
+                    try:
+                        await asyncio.wait_for(changed.wait(), max(0.0, 30 - (time.time() - state.last_change)))
+                    except asyncio.TimeoutError:
+                        pass
+                    if self.stop_event.is_set():
+                        break
+                if not pending:
+                    if time.time() - state.last_change >= 30:
+                        state.stagnant = True
+                        if state.bought and not state.sold:
+                            if await self.sell(mint, state.balance, state.our_change_pct):
+                                state.sold = True
+                                logging.info(f"Sold {mint} at {to_float(state.price):.10f}")
+                            self.pools[mint]["sold"] = True
+                        break
                     continue
-                last_price_change = time.time()                
-                momentum += 0.01 if new_price > last_price else -0.01 if new_price < last_price else 0
-                last_price = new_price 
-
-                self.mint_data[mint].setdefault("price_history", []).append(new_price)
-
-                # If we haven't recorded the buy_price previously, do so
-                if mint in self.mint_data and "buy_price" not in self.mint_data[mint]:
-                    balance = self.mint_data[mint]["balance"]
-                    if balance > 0:
-                        self.mint_data[mint]["buy_price"] = new_price
-
-                change_pct = self._calc_change_pct(
-                    self.mint_data[mint].get("open_price", 0), 
-                    new_price
-                )
-                if change_pct > peak_change:
-                    peak_change = change_pct
-
-                if change_pct != prev_change_pct:
-                    if not pct_diff:
-                        pct_diff.append(round(change_pct, 2))
-                    else:
-                        pct_diff.append(round(change_pct - prev_change_pct, 2))
-                    prev_change_pct = change_pct
-
-                diffs_threshold = all(diff >= -10 for diff in pct_diff)
-
-                logging.info(
-                    f"""Price: {new_price:.10f} for mint {mint} at {time.strftime('%H:%M:%S')}
-                    Owner: {self.creators.get(mint, "Unknown")}
-                    Price USD: {price_usd:.5f}
-                    Market Cap: {f"{market_cap:,.2f}$"}
-                    Current step: {current_step}
-                    Change: {change_pct:.2f}%
-                    Volume: {volume}$
-                    """
-                )
-                elapsed = time.time() - self.mint_data[mint].get("timestamp", 0)
-
-                curtime = time.time()
-                if curtime - last_logged_time >= 10:
-                    last_logged_time = curtime
-                    pct_diff = []
-                    logging.info(f"Momentum for {mint}: {momentum:.2f}")
-                    momentum = 0
-                    is_boosted, boosts = await self.dexscreen.get_chain_address_info(mint)
-                    if is_boosted and mint not in self.boosted_mints:
-                        self.boosted_mints[mint] = boosts
-                        logging.info(f"{cc.YELLOW}Boosted token: {mint} with {boosts} boosts")
-                    elif mint in self.boosted_mints:
-                        if self.boosted_mints[mint] != boosts:
-                            self.boosted_mints[mint] = boosts
-                            logging.info(f"{cc.YELLOW}Token {mint} is boosted with {boosts} boosts{cc.RESET}")
-
-                # if price drops below -40% and it’s been at least 13s
-                if (change_pct <= -40 and elapsed >= 13 or change_pct <= -15 and elapsed >= 60 or elapsed > 60 * 60) and not session_meta["bought"]:
-                    logging.info(f"Exiting due to low change: {change_pct:.2f}% for elapsed time: {elapsed:.2f}s")
-                    break
-
-                buy_to_sell = (volume["sell"] * 100) / volume["buy"] if volume["buy"] > 0 else 0
-                if price_len >= 20 and buy_to_sell >= 100 and not session_meta["bought"]:
-                    logging.info(f"Buy to sell ratio is too high: {buy_to_sell}")
+                new_price, timestamp = pending.popleft()
+                state.iterations += 1
+                if await self.evaluate_tick(state, new_price, timestamp):
                     break
-
-                in_entry_range = await self.determine_safe_range(buy_to_sell, price_len)
-                if "buy_price" not in self.mint_data[mint] and not session_meta["bought"]:
-                    if in_entry_range and diffs_threshold:
-                        if change_pct >= 80:
-                            logging.info(f"Change pct at the moment of buy: {change_pct}")
-                            balance = await self.buy(mint, 1)
-                        else:
-                            continue
-                        if balance == "QuoteUnavailable":
-                            break
-                        logging.info(f"Balance: {balance}")
-                        time_since_buy = time.time()
-                        self.mint_data[mint]["balance"] = balance
-                        session_meta["bought"] = True
-                
-                # Our own buy-based change
-                our_change_pct = self._calc_change_pct(
-                    self.mint_data.get(mint, {}).get("buy_price", 0), 
-                    new_price
-                )
-
-                if our_change_pct != 0:
-                    elapsed_since_buy = time.time() - time_since_buy
-                    if new_price > self.mint_data[mint].get("our_peak_price", 0):
-                        self.mint_data[mint]["our_peak_price"] = new_price
-
-                    logging.info(f"Our change for {mint}: {our_change_pct:.2f}%")
-                    current_step = await self.determine_inc_factor(momentum, volume, our_change_pct, elapsed_since_buy, current_step)
-
-                    if (
-                        our_change_pct >= current_step
-                        or (our_change_pct <= -12)
-                    ):
-                        await self.sell(mint, self.mint_data[mint].get("balance"), our_change_pct)
-                        logging.info(f"Sold {mint} at {new_price}")
-                        self.pools[mint]["sold"] = True
-                        session_meta["sold"] = True
-                        break
-                await asyncio.sleep(0.02)
             except Exception as e:
                 logging.error(f"Error in session tracker: {e}")
                 traceback.print_exc()
                 break
         self.pools[mint]["sold"] = True
+        self.engine.close(mint)
+        self.retries.cancel_session(mint)
+        await self.release_pools(mint)
         await self.save_tracker({
             "mint": mint, 
             "owner": self.creators.get(mint, "NN"), 
-            "latest_price": new_price, 
-            "price_history": self.mint_data[mint].get("price_history", []), 
+            "latest_price": to_float(state.price), 
+            "price_history": list(indicators.history.series()[1]), 
             "saved_at": time.time(), 
-            "current_change": change_pct, 
-            "peak_change": peak_change, 
-            "market_cap": market_cap, 
-            "volume": volume,
-            "pct_diff": pct_diff,
+            "current_change": state.change_pct, 
+            "peak_change": state.peak_change, 
+            "market_cap": state.market_cap, 
+            "volume": flow.snapshot(),
+            "pct_diff": list(indicators.steps.steps),
+            "indicators": indicators.summary(),
         })
-        self.mint_data.pop(mint, None)
+
+    async def evaluate_tick(self, state, new_price, timestamp):
+        """Run the entry and exit rules on one new price of `state`; True ends the session."""
+        mint = state.mint
+        indicators = state.indicators
+        flow = indicators.flow
+        price_len = indicators.ticks
+        if new_price == state.last_price:
+            return False
+        state.last_change = timestamp
+        change_pct = state.change_pct = pct_change(state.open_price, new_price)
+        indicators.tick(state.last_change, state.last_price, new_price, change_pct)
+        state.last_price = new_price
+
+        # If we haven't recorded the buy_price previously, do so
+        if not state.buy_price and state.balance > 0:
+            state.buy_price = new_price
+
+        if change_pct > state.peak_change:
+            state.peak_change = change_pct
+
+        diffs_threshold = indicators.steps.all_above(-10)
+
+        logging.info(
+            f"""Price: {to_float(new_price):.10f} for mint {mint} at {time.strftime('%H:%M:%S')}
+            Owner: {self.creators.get(mint, "Unknown")}
+            Price USD: {to_usd(new_price, self.swaps.sol_price_usd):.5f}
+            Market Cap: {f"{state.market_cap:,.2f}$"}
+            Current step: {state.current_step}
+            Change: {change_pct:.2f}%
+            Volume: {flow.snapshot()}$
+            """
+        )
+        elapsed = timestamp - state.opened_at
+
+        if timestamp - state.last_logged >= 10:
+            state.last_logged = timestamp
+            indicators.steps.reset()
+            logging.info(f"Momentum for {mint}: {indicators.momentum.value:.2f}")
+            indicators.momentum.reset()
+            summary = indicators.summary()
+            logging.info(
+                f"{cc.LIGHT_GRAY}Indicators for {mint}: ema={summary['ema_fast']:.10f}/{summary['ema_slow']:.10f} "
+                f"vwap={summary['vwap'] or 0:.10f} drawdown={summary['drawdown_pct']:.2f}%{cc.RESET}"
+            )
+            is_boosted, boosts = await self.dexscreen.get_chain_address_info(mint)
+            if is_boosted and mint not in self.boosted_mints:
+                self.boosted_mints[mint] = boosts
+                logging.info(f"{cc.YELLOW}Boosted token: {mint} with {boosts} boosts")
+            elif mint in self.boosted_mints:
+                if self.boosted_mints[mint] != boosts:
+                    self.boosted_mints[mint] = boosts
+                    logging.info(f"{cc.YELLOW}Token {mint} is boosted with {boosts} boosts{cc.RESET}")
+
+        # if price drops below -40% and it’s been at least 13s
+        if (change_pct <= -40 and elapsed >= 13 or change_pct <= -15 and elapsed >= 60 or elapsed > 60 * 60) and not state.bought:
+            logging.info(f"Exiting due to low change: {change_pct:.2f}% for elapsed time: {elapsed:.2f}s")
+            return True
+
+        buy_to_sell = flow.sell_ratio()
+        if price_len >= 20 and buy_to_sell >= 100 and not state.bought:
+            logging.info(f"Buy to sell ratio is too high: {buy_to_sell}")
+            return True
+
+        in_entry_range = await self.determine_safe_range(buy_to_sell, price_len)
+        if not state.buy_price and not state.bought:
+            if self.creators.get(mint) in self.blacklist:
+                logging.info(f"{cc.MAGENTA}Owner is blacklisted: {self.creators[mint]}")
+                return True
+            if in_entry_range and diffs_threshold:
+                if change_pct < 80:
+                    return False
+                logging.info(f"Change pct at the moment of buy: {change_pct}")
+                balance = await self.open_position(state)
+                if balance == "PositionCapped":
+                    return False
+                if balance is None or balance == "QuoteUnavailable":
+                    return True
+                if balance == "Unconfirmed":
+                    logging.warning(f"Position in {mint} stays reserved until its buy is confirmed or sold")
+                    return True
+                logging.info(f"Balance: {balance}")
+                state.bought_at = time.time()
+                state.balance = balance
+                state.bought = True
+
+        # Our own buy-based change
+        our_change_pct = state.our_change_pct = pct_change(state.buy_price, new_price)
+
+        if our_change_pct != 0:
+            elapsed_since_buy = timestamp - state.bought_at
+            if new_price > state.our_peak_price:
+                state.our_peak_price = new_price
+
+            logging.info(f"Our change for {mint}: {our_change_pct:.2f}%")
+            state.current_step = await self.determine_inc_factor(indicators.momentum.value, flow, our_change_pct, elapsed_since_buy, state.current_step)
+
+            if (
+                our_change_pct >= state.current_step
+                or (our_change_pct <= -12)
+            ):
+                if await self.sell(mint, state.balance, our_change_pct):
+                    state.sold = True
+                    logging.info(f"Sold {mint} at {to_float(new_price):.10f}")
+                self.pools[mint]["sold"] = True
+                return True
+        return False
+
+    async def open_position(self, state):
+        """
+        Reserve a position under the global caps, then buy.
+        Returns the token balance, "PositionCapped" when a cap or the wallet balance
+        is reached, or the failed buy's result. Only a buy that surely did not land
+        gives its reservation back; an unconfirmed one keeps it like a bought one.
+        """
+        amount = await usd_to_lamports(BUY_AMOUNT_USD, self.swaps.sol_price_usd)
+        fee = await usd_to_lamports(0.07, self.swaps.sol_price_usd)
+        if not self.engine.reserve(state, BUY_AMOUNT_USD, amount + fee):
+            logging.info(f"Position caps or wallet balance ({self.engine.wallet} lamports spendable) reached, skipping buy of {state.mint}")
+            return "PositionCapped"
+        balance = None
+        try:
+            balance = await self.buy(state.mint, 1, amount, fee)
+        finally:
+            failed = balance is None or balance == "QuoteUnavailable"
+            self.engine.settle(state, spent=not failed)
+            if failed:
+                self.engine.release(state)
+            else:
+                state.bought = True
+        return balance
 
     async def determine_safe_range(self, buy_to_sell, price_len):
         if price_len <= 50:
@@ -478,13 +546,13 @@ class DexBetterLogs:
         elif price_len <= 2000:
             return buy_to_sell <= 80
 
-    async def determine_inc_factor(self, momentum, volume, our_change_pct, elapsed_since_buy, current_step):
+    async def determine_inc_factor(self, momentum, flow, our_change_pct, elapsed_since_buy, current_step):
         next_increment = current_step + 40
         diff = next_increment - current_step
         half_diff = diff * 0.5
 
-        if volume["sell"] > volume["buy"] and our_change_pct <= 10 and elapsed_since_buy >= 30:
-            logging.info(f"Volume sell is higher than buy: {volume['sell']} > {volume['buy']}")
+        if flow.sells > flow.buys and our_change_pct <= 10 and elapsed_since_buy >= 30:
+            logging.info(f"Volume sell is higher than buy: {flow.sells} > {flow.buys}")
             return -99
 
         if our_change_pct <= -35 or (our_change_pct <= -20 and elapsed_since_buy >= 140):
@@ -505,26 +573,8 @@ class DexBetterLogs:
         return current_step
                     
     async def get_latest_price(self, mint):
-        if mint in self.mint_data:
-            return self.mint_data[mint].get("price")
-        return 0
-
-    def _calc_change_pct(self, open_price, new_price):
-        """Calculate percentage change between two prices."""
-        try:
-            return ((new_price - open_price) / open_price) * 100
-        except ZeroDivisionError:
-            return 0
-
-    def calculate_price(self, pool1_balance, pool2_balance):
-        """Calculate price based on pool balances."""
-        try:
-            price = pool1_balance / pool2_balance if pool2_balance > 0 else float('inf')
-            if price >= 1:
-                price = pool2_balance / pool1_balance if pool1_balance > 0 else float('inf')
-            return price
-        except ZeroDivisionError:
-            return float('inf')
+        state = self.engine.get(mint)
+        return state.price if state is not None else 0
 
     async def process_log(self, message):
         if 'params' in message:
@@ -539,11 +589,11 @@ class DexBetterLogs:
         return None
 
     async def validate(self, log_list, sig):
-        is_mint = False
+        """Pool creations initialize an LP mint (AMM v4, CPMM) or run a CLMM CreatePool, which initializes none."""
         for log in log_list:
-            if "InitializeMint" in log:
-                is_mint = True
-        return is_mint
+            if "InitializeMint" in log or "Instruction: CreatePool" in log:
+                return True
+        return False
 
     async def handle_mint_logs(self, log):
         """Handle mint-related logs to manage account subscriptions."""
@@ -555,12 +605,17 @@ class DexBetterLogs:
                 is_mint = await self.validate(pLog["logs"], pLog["signature"])
                 if not is_mint:
                     return None
+                if await self.fast_detect(pLog):
+                    return
+                if not any("InitializeMint" in line for line in pLog["logs"]):
+                    return None  # A CreatePool of another program, or a CLMM pool not paired with SOL
                 sig = pLog.get("signature")
                 tx_info = await self._fetch_ray_tx(sig)
                 #logging.info(f"TX Info: {json.dumps(tx_info,indent=2)}")
-                tx_info = tx_info.get("result", {})
-                if tx_info:
-                    program, keys = await self.extract_keys(tx_info, sig)
+                tx_info = (tx_info or {}).get("result", {})
+                extracted = await self.extract_keys(tx_info, sig) if tx_info else None
+                if extracted:
+                    program, keys = extracted
                     poolAddress, pool1, pool2, mint, owner = keys
                     self.creators[mint] = owner
                 else:
@@ -568,120 +623,281 @@ class DexBetterLogs:
                     return
                     
                 logging.info(f"{cc.CYAN}{cc.BRIGHT}New migration: {mint}, Program: {program}, pools: Pool1={pool1}, Pool2={pool2}, PoolAddress={poolAddress}{cc.RESET}")
-                if self.single_lock and len(self.mint_data) > 0:
-                    return
-                
                 if owner in self.blacklist:
                     logging.info(f"{cc.MAGENTA}Owner is blacklisted: {owner}")
                     return
 
-                if mint in ["So11111111111111111111111111111111111111112", "ATokenGPvbdGVxr1b2hvZbsiqW5xWH25efTNsLJA8knL", "TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb"]:
+                if mint in IGNORED_MINTS:
                     return
-                
+
+                if not self.claim_session(mint):
+                    return
+
+                if self.price_feed_mode == "logs" and program == "CPMM":
+                    balances = self._token_balances(tx_info)
+                    sol_balance, token_balance = balances.get(pool1), balances.get(pool2)
+                    if sol_balance and token_balance:
+                        sol_is_0 = sort_mints(SOL_ADDRESS, mint)[0] == SOL_ADDRESS
+                        reserves = (sol_balance[0], token_balance[0]) if sol_is_0 else (token_balance[0], sol_balance[0])
+                        await self.track_event_pool(poolAddress, mint, sol_is_0, pool1, pool2, reserves=reserves, decimals=token_balance[1])
+                        return
+
                 await self.manage_subscriptions(pool1, pool2, mint)
         except Exception as e:
             logging.error(f"Error handling mint logs: {e}")
             traceback.print_exc()
 
-    async def extract_keys(self, tx_info, sig):
-        try:
-            account_keys = tx_info.get("transaction", {}).get("message", {}).get("accountKeys", [])
-            pump_migration_match = any(PUMP_MIGRATION in key for key in account_keys)
-            owner = account_keys[0]
-            ak_len = len(account_keys)
-            logging.info(f"Len of account keys: {ak_len}\nPump migration match: {pump_migration_match}")
-            if pump_migration_match:
-                poolAddress = account_keys[2]
-                pool1 = account_keys[5]
-                pool2 = account_keys[6]
-                mint = account_keys[18]
-                return "PUMP", [poolAddress, pool1, pool2, mint, owner]
-            elif ak_len == 25:
-                poolAddress = account_keys[2]
-                pool1 = account_keys[6] # WSOL
-                pool2 = account_keys[5] # TOKEN
-                mint = account_keys[19] if account_keys[19] != "ATokenGPvbdGVxr1b2hvZbsiqW5xWH25efTNsLJA8knL" else account_keys[21]
-                return "RAY", [poolAddress, pool1, pool2, mint, owner]
-            elif ak_len == 24:
-                poolAddress = account_keys[2]
-                pool1 = account_keys[6] # WSOL
-                pool2 = account_keys[5] # TOKEN
-                mint = account_keys[20]
-                return "RAY", [poolAddress, pool1, pool2, mint, owner]
-            elif ak_len == 23:
-                poolAddress = account_keys[2]
-                pool1 = account_keys[6] # WSOL
-                pool2 = account_keys[5] # TOKEN
-                mint = account_keys[19]
-                return "RAY", [poolAddress, pool1, pool2, mint, owner]
-            elif ak_len == 22:
-                poolAddress = account_keys[2]
-                pool1 = account_keys[6]
-                pool2 = account_keys[5]
-                mint = account_keys[18] if account_keys[18] not in ["So11111111111111111111111111111111111111112", "ATokenGPvbdGVxr1b2hvZbsiqW5xWH25efTNsLJA8knL"] else account_keys[16]
-                return "RAY", [poolAddress, pool1, pool2, mint, owner]
-            elif ak_len == 21:
-                poolAddress = account_keys[2]
-                pool1 = account_keys[5]
-                pool2 = account_keys[6]
-                mint = account_keys[18]
-                return "RAY", [poolAddress, pool1, pool2, mint, owner]
-            elif ak_len == 20:
-                poolAddress = account_keys[2]
-                pool1 = account_keys[5]
-                pool2 = account_keys[6]
-                mint = account_keys[17]
-                return "RAY", [poolAddress, pool1, pool2, mint, owner]
-            elif ak_len == 19: # moonshot
-                poolAddress = account_keys[2]
-                pool1 = account_keys[6]
-                pool2 = account_keys[5]
-                mint = account_keys[16]
-                return "MOONSHOT", [poolAddress, pool1, pool2, mint, owner]
-            elif ak_len == 18: # RPCMM
-                poolAddress = account_keys[2]
-                pool1 = account_keys[6]
-                pool2 = account_keys[5]
-                mint = account_keys[17]
-                return "RAY", [poolAddress, pool1, pool2, mint, owner]
+    def find_init_log(self, log_list):
+        """Decode the AMM v4 InitLog carried in a `ray_log:` line, if any."""
+        for log in log_list:
+            index = log.find("ray_log: ")
+            if index < 0:
+                continue
+            try:
+                parsed = self.ray_parser.parse_record(log[index + 9:].strip())
+            except Exception:
+                continue
+            if parsed.log_type == LOG_TYPE_INIT:
+                return parsed
+        return None
+
+    async def fast_detect(self, pLog):
+        """
+        Start tracking an AMM v4 pool straight from its InitLog: the pool and vaults
+        are derived from the market, so subscriptions go out without fetching the
+        transaction. The mint and creator are resolved concurrently. Logs without
+        an InitLog are checked for a CLMM PoolCreatedEvent instead.
+        """
+        init = self.find_init_log(pLog["logs"])
+        if init is None:
+            return await self.fast_detect_clmm(pLog)
+        market = init.market_pubkey
+        keys = amm_v4_keys(market)
+        pool1, pool2 = keys["pc_vault"], keys["coin_vault"]
+        logging.info(f"{cc.CYAN}{cc.BRIGHT}New migration from ray_log: market={market}, pools: Pool1={pool1}, Pool2={pool2}, PoolAddress={keys['amm']}{cc.RESET}")
+        if not self.engine.has_capacity():
+            self.price_feed.untrack(keys["amm"])  # The ingestor may have started tracking it from the same frame
+            return True
+
+        if self.price_feed_mode == "logs":
+            # Priced from swap logs on the existing logs stream; no vault subscriptions needed.
+            # The ingestor usually started tracking the pool already, in which case this is a no-op.
+            self.price_feed.track(keys["amm"], init)
+            asyncio.create_task(self.resolve_fast_mint(pLog["signature"], init, pool1, pool2, keys["amm"]))
+            return True
+        mint = asyncio.ensure_future(self.resolve_fast_mint(pLog["signature"], init, pool1, pool2))
+        await self.manage_subscriptions(pool1, pool2, mint)
+        return True
+
+    async def fast_detect_clmm(self, pLog):
+        """
+        Start tracking a SOL-paired CLMM pool straight from its PoolCreatedEvent,
+        which names the mints, vaults and initial price.
+        """
+        created = next((event for event in decode_events(pLog["logs"]) if isinstance(event, ClmmPoolCreatedEvent)), None)
+        if created is None:
+            return False
+        mint_0, mint_1 = created.token_mint_0_pubkey, created.token_mint_1_pubkey
+        if SOL_ADDRESS not in (mint_0, mint_1):
+            return False
+        sol_is_0 = mint_0 == SOL_ADDRESS
+        mint = mint_1 if sol_is_0 else mint_0
+        vault_0, vault_1 = created.token_vault_0_pubkey, created.token_vault_1_pubkey
+        pool1, pool2 = (vault_0, vault_1) if sol_is_0 else (vault_1, vault_0)
+        address = created.pool_pubkey
+        logging.info(f"{cc.CYAN}{cc.BRIGHT}New CLMM pool from event: {mint}, pools: Pool1={pool1}, Pool2={pool2}, PoolAddress={address}{cc.RESET}")
+        if mint in IGNORED_MINTS or not self.claim_session(mint):
+            return True
+
+        asyncio.create_task(self.resolve_creator(pLog["signature"], mint, pool1, pool2))
+        if self.price_feed_mode == "logs":
+            asyncio.create_task(self.track_event_pool(address, mint, sol_is_0, pool1, pool2, sqrt_price_x64=created.sqrt_price_x64))
+        else:
+            await self.manage_subscriptions(pool1, pool2, mint)
+        return True
+
+    async def track_event_pool(self, address, mint, sol_is_0, pool1, pool2, reserves=None, sqrt_price_x64=None, decimals=None):
+        """Price a CPMM/CLMM pool from its swap events, falling back to vault subscriptions without decimals."""
+        if decimals is None:
+            decimals = await self.token_decimals(mint)
+        if decimals is None:
+            await self.manage_subscriptions(pool1, pool2, mint)
+            return
+        entry = self.pools.setdefault(mint, {"pool1": pool1, "pool2": pool2, "sold": False})
+        if entry["sold"]:
+            return
+        entry["feed"] = address
+        decimals_0, decimals_1 = (9, decimals) if sol_is_0 else (decimals, 9)
+        self.price_feed.track_pool(address, mint, sol_is_0, decimals_0, decimals_1, reserves, sqrt_price_x64)
+
+    async def token_decimals(self, mint):
+        if mint == SOL_ADDRESS:
+            return 9
+        decimals = self.cache.decimals.get(mint)
+        if decimals is None:
+            await self.swaps.get_token_supply(mint)
+            decimals = self.cache.decimals.get(mint)
+        return decimals
+
+    def _token_balances(self, tx_info):
+        """{token account: (raw amount, decimals)} from a transaction's post token balances."""
+        message = tx_info.get("transaction", {}).get("message", {})
+        meta = tx_info.get("meta") or {}
+        loaded = meta.get("loadedAddresses") or {}
+        account_keys = message.get("accountKeys", []) + loaded.get("writable", []) + loaded.get("readonly", [])
+        balances = {}
+        for balance in meta.get("postTokenBalances") or []:
+            index = balance.get("accountIndex", len(account_keys))
+            amount = balance.get("uiTokenAmount") or {}
+            if index < len(account_keys) and amount.get("amount") is not None:
+                balances[account_keys[index]] = (int(amount["amount"]), amount.get("decimals"))
+        return balances
+
+    async def resolve_fast_mint(self, sig, init, pool1, pool2, amm=None):
+        """
+        Resolve the token mint of a fast-detected pool, falling back to the transaction.
+        With `amm` set the pool is being priced by the swap feed, which gets the mint attached.
+        """
+        mint = await self._resolve_fast_mint(sig, init, pool1, pool2)
+        sol_is_pc = self.sol_is_pc.pop(mint, True)
+        if mint is not None and not self.claim_session(mint):
+            mint = None
+        if amm is not None:
+            if mint is None:
+                self.price_feed.untrack(amm)
             else:
-                # Guess
-                poolAddress = account_keys[2]
-                pool1 = account_keys[6]
-                pool2 = account_keys[5]
-                mint = account_keys[17]
-                return "Unknown", [poolAddress, pool1, pool2, mint, owner]
-        except IndexError as e:
-            logging.info(f"Index error for {sig}: {e}")
-            logging.info(f"Account keys: {account_keys}")
+                self.pools[mint] = {"pool1": pool1, "pool2": pool2, "sold": False, "feed": amm}
+                self.price_feed.attach(amm, mint, sol_is_pc)
+        return mint
+
+    async def _resolve_fast_mint(self, sig, init, pool1, pool2):
+        market = init.market_pubkey
+        mints = await self._fetch_market_mints(market)
+        if mints:
+            coin_mint, pc_mint = mints
+            self.cache.decimals[coin_mint] = init.coin_decimals
+            self.cache.decimals[pc_mint] = init.pc_decimals
+            mint = coin_mint if pc_mint == SOL_ADDRESS else pc_mint
+            self.sol_is_pc[mint] = mint == coin_mint
+            asyncio.create_task(self.resolve_creator(sig, mint, pool1, pool2))
+        else:
+            tx_info = (await self._fetch_ray_tx(sig) or {}).get("result")
+            extracted = await self.extract_keys(tx_info, sig) if tx_info else None
+            if not extracted:
+                logging.info(f"Mint not found for market {market}")
+                return None
+            _, (_, _, _, mint, owner) = extracted
+            self.creators[mint] = owner
+            if owner in self.blacklist:
+                logging.info(f"{cc.MAGENTA}Owner is blacklisted: {owner}")
+                return None
+
+        if mint in IGNORED_MINTS:
             return None
+        logging.info(f"{cc.CYAN}{cc.BRIGHT}New migration: {mint}, market={market}{cc.RESET}")
+        return mint
 
-    async def _fetch_ray_tx(self, sig):
+    async def resolve_creator(self, sig, mint, pool1, pool2):
+        """Fill in the pool creator off the detection path and drop blacklisted owners."""
+        tx_info = (await self._fetch_ray_tx(sig, session=mint) or {}).get("result")
+        if not tx_info:
+            return
+        account_keys = tx_info.get("transaction", {}).get("message", {}).get("accountKeys", [])
+        if not account_keys:
+            return
+        owner = account_keys[0]
+        self.creators[mint] = owner
+        if owner in self.blacklist:
+            logging.info(f"{cc.MAGENTA}Owner is blacklisted: {owner}")
+            self.pools.setdefault(mint, {"pool1": pool1, "pool2": pool2, "sold": False})["sold"] = True
+            await self.release_pools(mint)
+
+    async def _fetch_market_mints(self, market):
+        """Read (base/coin mint, quote/pc mint) from an OpenBook market account."""
         try:
-            msg = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "getTransaction",
-                "params": [
-                        sig,
-                        {
-                            "commitment": "confirmed",
-                            "encoding": "json",
-                            "maxSupportedTransactionVersion": 0
-                        }
-                    ]
+            async with self.rpc_slots:
+                res = await self.rpc.call("getAccountInfo", [market, {"encoding": "base64", "commitment": "processed"}], DETECTION)
+            value = (res.get("result") or {}).get("value")
+            if not value:
+                return None
+            data = base64.b64decode(value["data"][0])
+            # 5 bytes padding, account_flags u64, own_address, vault_signer_nonce u64, base_mint, quote_mint
+            return base58.b58encode(data[53:85]).decode(), base58.b58encode(data[85:117]).decode()
+        except Exception as e:
+            logging.error(f"Error when fetching market {market}: {e}")
+            return None
+
+    async def extract_keys(self, tx_info, sig):
+        """
+        Identify the pool created by `tx_info` and derive its vaults locally.
+        AMM v4 pools (including pump.fun migrations) are derived from the market in
+        their InitLog, CPMM/CLMM pools from the mint pair; either way the derived
+        pool must appear among the transaction's accounts.
+        """
+        message = tx_info.get("transaction", {}).get("message", {})
+        meta = tx_info.get("meta") or {}
+        loaded = meta.get("loadedAddresses") or {}
+        account_keys = message.get("accountKeys", []) + loaded.get("writable", []) + loaded.get("readonly", [])
+        if not account_keys:
+            return None
+        key_set = set(account_keys)
+        owner = account_keys[0]
+        balance_mints = {
+            account_keys[balance["accountIndex"]]: balance.get("mint")
+            for balance in meta.get("postTokenBalances") or []
+            if balance.get("accountIndex", len(account_keys)) < len(account_keys)
+        }
+
+        init = self.find_init_log(meta.get("logMessages") or [])
+        if init:
+            keys = amm_v4_keys(init.market_pubkey)
+            if keys["amm"] in key_set:
+                coin_mint = balance_mints.get(keys["coin_vault"])
+                pc_mint = balance_mints.get(keys["pc_vault"])
+                mint = coin_mint if pc_mint == SOL_ADDRESS else pc_mint
+                if mint:
+                    program = "PUMP" if PUMP_MIGRATION in key_set else "RAY"
+                    return program, [keys["amm"], keys["pc_vault"], keys["coin_vault"], mint, owner]
+
+        candidates = {mint for mint in balance_mints.values() if mint and mint != SOL_ADDRESS}
+        for program, name in ((RPLMM, "CPMM"), (RCLMM, "CLMM")):
+            if program not in key_set:
+                continue
+            for mint in candidates:
+                keys = find_pool_keys(program, mint, key_set)
+                if keys:
+                    return name, [keys["pool"], vault_for(keys, SOL_ADDRESS), vault_for(keys, mint), mint, owner]
+
+        logging.info(f"No derivable pool found in {sig}")
+        return None
+
+    async def _fetch_ray_tx(self, sig, session=None):
+        """Poll getTransaction until the transaction is visible or TX_FETCH_DEADLINE passes."""
+        cached = self.cache.transactions.get(sig)
+        if cached is not None:
+            return cached
+        params = [
+            sig,
+            {
+                "commitment": "confirmed",
+                "encoding": "json",
+                "maxSupportedTransactionVersion": 0
             }
-            async with self.session.post(RPC_URL, json=msg) as response:
-                res = await response.json()
-                if 'result' in res:
-                    if res['result'] == "null" or not res['result']:
-                        await asyncio.sleep(1)
-                        return await self._fetch_ray_tx(sig)
-            return res
+        ]
 
-        except Exception as e:
-            logging.error(f"Error when fetching transaction data: {e}")
-            traceback.print_exc()
+        async def attempt():
+            async with self.rpc_slots:
+                res = await self.rpc.call("getTransaction", params, DETECTION)
+            if res.get("result"):
+                return res
+            return None
+
+        res = await self.retries.run("getTransaction", attempt, TX_FETCH_DEADLINE, session)
+        if res is None:
+            logging.info(f"Transaction {sig} not available within {TX_FETCH_DEADLINE}s")
+        else:
+            self.cache.transactions[sig] = res
+        return res
 
     async def manage_subscriptions(self, pool1, pool2, mint):
         """Add subscriptions for new pools dynamically without affecting existing ones."""
@@ -695,43 +911,81 @@ class DexBetterLogs:
 
     async def unsubscribe_from_account(self, address):
         """Unsubscribe from a specific account."""
-        ws = self.subscriptions.pop(address, None)
-        if ws:
-            try:
-                await ws.close()
-            except Exception as e:
-                logging.error(f"Error unsubscribing from {address}: {e}")
+        self.vaults.pop(address, None)
+        if self.subscriptions.pop(address, None) is not None:
+            await self.account_pool.unsubscribe(address)
+
+    async def release_pools(self, mint):
+        """Drop the account subscriptions or swap-feed tracking backing a finished session."""
+        self.engine.unclaim(mint)
+        self.balances.pop(mint, None)
+        address = self.pools.get(mint, {}).get("feed")
+        if address:
+            self.price_feed.untrack(address)
+        for role in ("pool1", "pool2"):
+            address = self.pools.get(mint, {}).get(role)
+            if address:
+                await self.unsubscribe_from_account(address)
 
     async def run(self):
         """Run the main process."""
         await intro()
         self.setup_signal_handlers()
         self.load_blacklist()
+        self.cache.load()
         self.swaps = SolanaSwaps(
             self,
             Keypair.from_bytes(base58.b58decode(PRIV_KEY)),
             WALLET,
             RPC_URL,
-            API_KEY
+            API_KEY,
+            rpc=self.rpc,
+            retries=self.retries,
+            cache=self.cache,
+            limiter=self.limiter,
+            session=self.session,
         )
-        self.dev_balance = await self.swaps.fetch_wallet_balance_sol()
+        await self.prewarm()
+        self.engine.set_wallet(await self.swaps.fetch_wallet_balance_sol())
+        await self.account_pool.start()
         await asyncio.gather(
             self.subscribe_logs(),
             self.process_logs(),
+            self.rpc.report(self.stop_event),
+            self.retries.report(),
+            self.cache.autosave(self.stop_event),
+            self.limiter.report(self.stop_event),
+            self.price_feed.report(self.stop_event),
+            self.price_feed.watch(self.stop_event),
+            self.engine.report(self.stop_event),
+            self.http.keep_hot(self.stop_event),
+            self.http.report(self.stop_event),
         )
 
+    async def prewarm(self):
+        """Open RPC, Dexscreener and Jupiter connections before the first detection needs them."""
+        async def open_jupiter():
+            try:
+                await self.swaps.open_ws_session()
+            except Exception as e:
+                logging.error(f"Failed to pre-open Jupiter websocket: {e}")
+
+        await asyncio.gather(self.http.prewarm(), open_jupiter())
+
     async def process_logs(self):
-        """Process logs as they arrive."""
-        while not self.stop_event.is_set():
-            log = await self.logs.get()
-            await self.handle_mint_logs(log)
+        """Process logs as they arrive on a pool of concurrent workers."""
+        self.log_workers = LogWorkerPool(self.logs, self.handle_mint_logs, LOG_WORKERS, self.stop_event)
+        await self.log_workers.run()
 
     async def shutdown(self):
         """Gracefully shut down."""
         self.stop_event.set()
-        for ws in self.subscriptions.values():
-            await ws.close()
-        await self.session.close()
+        self.engine.wake_all()
+        self.retries.cancel_all()
+        await self.account_pool.close()
+        self.subscriptions.clear()
+        self.cache.save()
+        await self.http.close()
 
 async def main():
     dex_logs = DexBetterLogs(WS_URL)
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import random
+from collections import defaultdict
+
+try:
+    from .common_ import *
+    from .colors import *
+except ImportError:
+    from common_ import *
+    from colors import *
+
+
+class MethodStats:
+    """Attempt and time-to-success counters for one RPC method."""
+
+    def __init__(self):
+        self.calls = 0
+        self.attempts = 0
+        self.successes = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.total_success_time = 0.0
+        self.max_success_time = 0.0
+
+    def success(self, elapsed):
+        self.successes += 1
+        self.total_success_time += elapsed
+        self.max_success_time = max(self.max_success_time, elapsed)
+
+    def snapshot(self):
+        return {
+            "calls": self.calls,
+            "attempts": self.attempts,
+            "successes": self.successes,
+            "timeouts": self.timeouts,
+            "cancelled": self.cancelled,
+            "avg_success_ms": self.total_success_time / self.successes * 1000 if self.successes else 0.0,
+            "max_success_ms": self.max_success_time * 1000,
+        }
+
+
+class RetryScheduler:
+    """
+    Retries async operations with exponential backoff, jitter and a per-operation deadline.
+
+    `attempt()` is called until it returns something other than None. Delays
+    start at `base_delay` and grow by `factor` up to `max_delay`, each scaled by
+    a random +/- `jitter` fraction. When the deadline passes, or the owning
+    session is cancelled, `run` returns None.
+    """
+
+    def __init__(self, stop_event=None, base_delay=RETRY_BASE_DELAY, max_delay=RETRY_MAX_DELAY, factor=2.0, jitter=0.5):
+        self.stop_event = stop_event or asyncio.Event()
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.factor = factor
+        self.jitter = jitter
+        self.stats = defaultdict(MethodStats)
+        self.sessions = defaultdict(set)  # {session: {asyncio.Task}}
+
+    async def run(self, method, attempt, deadline=RETRY_DEADLINE, session=None, initial_delay=0.0):
+        task = asyncio.ensure_future(self._attempts(method, attempt, deadline, initial_delay))
+        self.sessions[session].add(task)
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if not task.cancelled() or asyncio.current_task().cancelling():
+                raise
+            self.stats[method].cancelled += 1
+            return None
+        finally:
+            tasks = self.sessions.get(session)
+            if tasks is not None:
+                tasks.discard(task)
+                if not tasks:
+                    self.sessions.pop(session, None)
+
+    async def _attempts(self, method, attempt, deadline, initial_delay):
+        loop = asyncio.get_running_loop()
+        stats = self.stats[method]
+        stats.calls += 1
+        started = loop.time()
+        end = started + deadline
+        delay = self.base_delay
+        if initial_delay:
+            await asyncio.sleep(min(initial_delay, deadline))
+
+        while not self.stop_event.is_set():
+            stats.attempts += 1
+            try:
+                result = await attempt()
+            except Exception as e:
+                logging.debug(f"{method} attempt {stats.attempts} failed: {e}")
+                result = None
+            if result is not None:
+                stats.success(loop.time() - started)
+                return result
+
+            remaining = end - loop.time()
+            if remaining <= 0:
+                break
+            wait = delay * (1 + random.uniform(-self.jitter, self.jitter))
+            await asyncio.sleep(min(wait, remaining))
+            delay = min(delay * self.factor, self.max_delay)
+
+        stats.timeouts += 1
+        logging.warning(f"{method} gave up after {loop.time() - started:.2f}s")
+        return None
+
+    def cancel_session(self, session):
+        """Cancel every pending operation started for `session`."""
+        for task in self.sessions.pop(session, ()):
+            task.cancel()
+
+    def cancel_all(self):
+        for session in list(self.sessions):
+            self.cancel_session(session)
+
+    async def report(self, interval=LOG_STATS_INTERVAL):
+        while not self.stop_event.is_set():
+            await asyncio.sleep(interval)
+            for method, stats in list(self.stats.items()):
+                snap = stats.snapshot()
+                logging.info(
+                    f"{cc.LIGHT_GRAY}Retries {method}: calls={snap['calls']} attempts={snap['attempts']} "
+                    f"ok={snap['successes']} timeouts={snap['timeouts']} cancelled={snap['cancelled']} "
+                    f"avg_success={snap['avg_success_ms']:.1f}ms max_success={snap['max_success_ms']:.1f}ms{cc.RESET}"
+                )
@@ -0,0 +1,128 @@
+import asyncio
+import itertools
+import logging
+import time
+
+import aiohttp
+
+try:
+    from .common_ import *
+    from .colors import *
+    from .limiter import EXECUTION, DETECTION
+except ImportError:
+    from common_ import *
+    from colors import *
+    from limiter import EXECUTION, DETECTION
+
+
+class BatchStats:
+    """Batch size and round-trip latency counters."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.batches = 0
+        self.calls = 0
+        self.max_batch = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def record(self, size, latency):
+        self.batches += 1
+        self.calls += size
+        self.max_batch = max(self.max_batch, size)
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    def snapshot(self):
+        return {
+            "batches": self.batches,
+            "calls": self.calls,
+            "avg_batch": self.calls / self.batches if self.batches else 0.0,
+            "max_batch": self.max_batch,
+            "avg_latency_ms": self.total_latency / self.batches * 1000 if self.batches else 0.0,
+            "max_latency_ms": self.max_latency * 1000,
+        }
+
+
+class RpcBatcher:
+    """
+    JSON-RPC client that collects calls issued within `window` seconds into a
+    single batch request. Every call gets a unique id and receives its own
+    response object (`{"result": ...}` or `{"error": ...}`), exactly as if it
+    had been posted alone. Execution-lane calls (sends, confirmations) are
+    always posted alone, so they never wait for the slowest call of a batch.
+    When a `limiter` is given, each call first takes a token from its
+    priority lane.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, url=RPC_URL, window=RPC_BATCH_WINDOW, max_batch=RPC_BATCH_MAX, limiter=None):
+        self.session = session
+        self.limiter = limiter
+        self.url = url
+        self.window = window
+        self.max_batch = max_batch
+        self.ids = itertools.count(1)
+        self.pending = []  # [(payload, future)]
+        self.flush_handle = None
+        self.tasks = set()
+        self.stats = BatchStats()
+
+    async def call(self, method, params=None, lane=DETECTION):
+        """Queue one JSON-RPC call and wait for its response object."""
+        if self.limiter is not None:
+            await self.limiter.acquire(lane)
+        future = asyncio.get_running_loop().create_future()
+        payload = {"jsonrpc": "2.0", "id": next(self.ids), "method": method, "params": params or []}
+        if lane == EXECUTION:
+            await self._send([(payload, future)])
+            return future.result()
+        self.pending.append((payload, future))
+        if len(self.pending) >= self.max_batch:
+            self._flush()
+        elif self.flush_handle is None:
+            self.flush_handle = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        batch, self.pending = self.pending, []
+        if batch:
+            task = asyncio.create_task(self._send(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _send(self, batch):
+        started = time.monotonic()
+        payload = batch[0][0] if len(batch) == 1 else [call for call, _ in batch]
+        try:
+            async with self.session.post(self.url, json=payload, headers={"Content-Type": "application/json"}) as response:
+                if response.status != 200:
+                    raise Exception(f"HTTP {response.status}: {await response.text()}")
+                data = await response.json(content_type=None)
+            if isinstance(data, dict):
+                data = [data]
+            responses = {item.get("id"): item for item in data}
+            for call, future in batch:
+                if not future.done():
+                    future.set_result(responses.get(call["id"], {"error": {"message": "No response for call"}}))
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self.stats.record(len(batch), time.monotonic() - started)
+
+    async def report(self, stop_event, interval=LOG_STATS_INTERVAL):
+        while not stop_event.is_set():
+            await asyncio.sleep(interval)
+            snap = self.stats.snapshot()
+            logging.info(
+                f"{cc.LIGHT_GRAY}RPC batches: {snap['batches']} for {snap['calls']} calls "
+                f"avg_size={snap['avg_batch']:.1f} max_size={snap['max_batch']} "
+                f"avg_latency={snap['avg_latency_ms']:.1f}ms max_latency={snap['max_latency_ms']:.1f}ms{cc.RESET}"
+            )
+            self.stats.reset()
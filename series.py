@@ -0,0 +1,144 @@
+from array import array
+
+try:
+    from .common_ import *
+except ImportError:
+    from common_ import *
+
+
+class RingSeries:
+    """
+    Fixed-capacity (timestamp, value) time series.
+
+    Samples live in two preallocated `array`s used as a ring (float64
+    timestamps, values of `typecode`, e.g. "Q" for raw token amounts), so
+    appending and reading the latest sample are O(1) and memory stays bounded
+    however long the series runs; once full, the oldest sample is overwritten.
+    Timestamps are expected to be non-decreasing. Reads return memoryview
+    slices of the arrays, so nothing is copied unless the requested samples
+    wrap around the end of the ring; either way `numpy.frombuffer` can wrap
+    the result.
+    """
+
+    __slots__ = ("capacity", "times", "values", "head", "count")
+
+    def __init__(self, capacity=SERIES_CAPACITY, typecode="d"):
+        self.capacity = capacity
+        self.times = array("d", bytes(8 * capacity))
+        self.values = array(typecode, bytes(array(typecode).itemsize * capacity))
+        self.head = 0  # Next slot to write
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, timestamp, value):
+        head = self.head
+        self.times[head] = timestamp
+        self.values[head] = value
+        head += 1
+        self.head = 0 if head == self.capacity else head
+        if self.count < self.capacity:
+            self.count += 1
+
+    def latest(self):
+        """Most recent value, or None when empty."""
+        return self.values[self.head - 1] if self.count else None
+
+    def latest_time(self):
+        return self.times[self.head - 1] if self.count else None
+
+    def _span(self, column, start):
+        """Samples from the `start`-th oldest on: a view when contiguous, a copy when they wrap."""
+        first = (self.head - self.count + start) % self.capacity
+        end = first + self.count - start
+        if end <= self.capacity:
+            return memoryview(column)[first:end]
+        return column[first:] + column[:end - self.capacity]
+
+    def _bisect(self, timestamp):
+        """Index (oldest = 0) of the first sample at or after `timestamp`, in O(log n) over the ring."""
+        times, capacity = self.times, self.capacity
+        oldest = self.head - self.count
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if times[(oldest + mid) % capacity] < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def series(self):
+        """(timestamps, values) of every stored sample, oldest first."""
+        return self._span(self.times, 0), self._span(self.values, 0)
+
+    def window(self, seconds, now=None):
+        """(timestamps, values) of the samples from the last `seconds`, oldest first."""
+        if not self.count:
+            return array("d"), array(self.values.typecode)
+        if now is None:
+            now = self.latest_time()
+        start = self._bisect(now - seconds)
+        return self._span(self.times, start), self._span(self.values, start)
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+
+
+class PoolSeries:
+    """Raw balance history of both vaults of one pool."""
+
+    __slots__ = ("pool1", "pool2")
+
+    def __init__(self, capacity=SERIES_CAPACITY, typecode="Q"):
+        self.pool1 = RingSeries(capacity, typecode)
+        self.pool2 = RingSeries(capacity, typecode)
+
+    def role(self, role):
+        return self.pool1 if role == "pool1" else self.pool2
+
+    def latest(self):
+        """(pool1, pool2) latest balances, or None until both vaults have reported."""
+        if not self.pool1.count or not self.pool2.count:
+            return None
+        return self.pool1.latest(), self.pool2.latest()
+
+
+if __name__ == "__main__":
+    import timeit
+
+    series = RingSeries(8)
+    for i in range(12):
+        series.append(float(i), i * 10.0)
+    assert len(series) == 8 and series.latest() == 110.0
+    assert list(series.series()[1]) == [i * 10.0 for i in range(4, 12)]
+    assert list(series.window(2.0)[0]) == [9.0, 10.0, 11.0]
+    assert isinstance(series.window(2.0)[0], memoryview)  # Contiguous: no copy
+    assert list(series.window(6.0)[1]) == [i * 10.0 for i in range(5, 12)]  # Wraps: copied
+    for size in range(1, 12):
+        ring = RingSeries(8)
+        for i in range(size):
+            ring.append(float(i), float(i))
+        for seconds in (0.0, 0.5, 1.0, 3.0, 20.0):
+            expected = [float(i) for i in range(size) if i >= size - 1 - seconds][-8:]
+            assert list(ring.window(seconds)[1]) == expected, (size, seconds)
+
+    # Window read cost on a full ring: the last second vs the whole ring
+    ring = RingSeries()
+    for i in range(ring.capacity * 3 + 100):
+        ring.append(i * 0.01, float(i))
+    for seconds in (1.0, 1e9):
+        elapsed = min(timeit.repeat(lambda: ring.window(seconds), number=10_000, repeat=3)) / 10_000
+        print(f"window({seconds:g}s) on {ring.capacity} samples: {elapsed * 1e6:.2f} us")
+
+    # Latest-value read after n updates: dict history vs ring buffer
+    for n in (1_000, 10_000, 100_000):
+        history, ring = {}, RingSeries()
+        for i in range(n):
+            history[float(i)] = float(i)
+            ring.append(float(i), float(i))
+        dict_time = min(timeit.repeat(lambda: list(history.values())[-1], number=100, repeat=3)) / 100
+        ring_time = min(timeit.repeat(ring.latest, number=100_000, repeat=3)) / 100_000
+        print(f"{n:>7} samples: dict {dict_time * 1e6:9.2f} us/read, ring {ring_time * 1e6:.3f} us/read")
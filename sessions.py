@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+try:
+    from .common_ import *
+    from .colors import *
+    from .indicators import SessionIndicators
+except ImportError:
+    from common_ import *
+    from colors import *
+    from indicators import SessionIndicators
+
+
+class SessionState:
+    """
+    Trading state of one mint session, fed by price ticks and read by its tracker task.
+    Every price change is queued in `pending` so the tracker evaluates each one in order,
+    however many arrive between its wakeups.
+    """
+
+    __slots__ = (
+        "mint", "supply", "opened_at", "open_price", "price", "last_price", "last_change", "changed", "pending",
+        "indicators", "current_step", "change_pct", "peak_change", "last_logged", "market_cap", "iterations",
+        "balance", "buy_price", "our_peak_price", "our_change_pct", "bought_at", "bought", "sold", "stagnant",
+        "exposure", "lamports",
+    )
+
+    def __init__(self, mint, price, timestamp):
+        now = time.time()
+        self.mint = mint
+        self.supply = None
+        self.opened_at = timestamp
+        self.open_price = price
+        self.price = price
+        self.last_price = 0
+        self.last_change = now
+        # Set on every price change; the opening price is evaluated right away
+        self.changed = asyncio.Event()
+        self.changed.set()
+        self.pending = deque([(price, timestamp)])  # (price, timestamp) not evaluated yet, oldest first
+        self.indicators = SessionIndicators()
+        self.indicators.trade(timestamp, price, None)
+        self.current_step = 40
+        self.change_pct = 0
+        self.peak_change = 0
+        self.last_logged = now
+        self.market_cap = 0
+        self.iterations = 0
+        self.balance = 0
+        self.buy_price = 0
+        self.our_peak_price = 0
+        self.our_change_pct = 0
+        self.bought_at = None
+        self.bought = False
+        self.sold = False
+        self.stagnant = False
+        self.exposure = 0.0  # USD reserved for this session's open position
+        self.lamports = 0    # Wallet lamports reserved for its buy until the buy settles
+
+    def tick(self, price, timestamp, side=None, sol_amount=0.0):
+        """
+        Feed a trade at `price` to the indicators and wake the tracker if the price moved.
+        Without a known `side` the trade side is inferred from the price move.
+        """
+        if side is None:
+            side = "buy" if price > self.price else "sell" if price < self.price else None
+        self.indicators.trade(timestamp, price, side, sol_amount)
+        if price != self.price:
+            self.price = price
+            self.pending.append((price, timestamp))
+            self.changed.set()
+
+
+class SessionEngine:
+    """
+    Registry of concurrently traded mints with global risk caps.
+
+    Each session is its own task woken by its own event, so a price tick costs
+    one dict lookup however many sessions are open. A detected pool claims a
+    session slot before its first price, so a burst of detections cannot
+    overshoot MAX_SESSIONS. A buy first reserves a position, its USD exposure
+    and its lamports from the wallet; reservations happen synchronously on
+    the event loop, so concurrent sessions cannot overshoot the caps or spend
+    the same balance twice. Closing a session releases its reservations,
+    except for a bought position that was not sold: its tokens are still in
+    the wallet, so it stays counted in `holding` until a sell is confirmed.
+    """
+
+    def __init__(self, max_sessions=MAX_SESSIONS, max_positions=MAX_OPEN_POSITIONS, max_exposure=MAX_EXPOSURE_USD):
+        self.max_sessions = max_sessions
+        self.max_positions = max_positions
+        self.max_exposure = max_exposure
+        self.sessions = {}  # {mint: SessionState}
+        self.pending = set()  # Detected mints holding a session slot until their first price
+        self.holding = {}  # {mint: SessionState} closed sessions whose bought tokens were never sold
+        self.positions = 0
+        self.exposure = 0.0
+        self.wallet = None  # Spendable lamports, None until the balance is first known
+        self.in_flight = 0  # Lamports reserved by buys that have not settled yet
+        self.opened = 0
+        self.rejected = 0
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def __contains__(self, mint):
+        return mint in self.sessions
+
+    def get(self, mint):
+        return self.sessions.get(mint)
+
+    def has_capacity(self):
+        return len(self.sessions) + len(self.pending) < self.max_sessions
+
+    def claim(self, mint):
+        """Hold a session slot for a detected `mint` until its first price opens the session."""
+        if mint in self.sessions or mint in self.pending:
+            return True
+        if not self.has_capacity():
+            return False
+        self.pending.add(mint)
+        return True
+
+    def unclaim(self, mint):
+        """Give back the slot of a mint that never priced; True if it was still pending."""
+        if mint in self.pending:
+            self.pending.discard(mint)
+            return True
+        return False
+
+    def open(self, mint, price, timestamp):
+        self.pending.discard(mint)
+        state = self.sessions[mint] = SessionState(mint, price, timestamp)
+        self.opened += 1
+        return state
+
+    def close(self, mint):
+        self.pending.discard(mint)
+        state = self.sessions.pop(mint, None)
+        if state is not None:
+            if state.exposure and state.bought and not state.sold:
+                self.holding[mint] = state
+            else:
+                self.release(state)
+        return state
+
+    def sold(self, mint):
+        """A sell of `mint` was confirmed; its position is released when the session closes, or now if it already has."""
+        state = self.sessions.get(mint)
+        if state is not None:
+            state.sold = True
+            return
+        state = self.holding.pop(mint, None)
+        if state is not None:
+            state.sold = True
+            self.release(state)
+
+    def set_wallet(self, balance):
+        """Refresh the spendable balance from an on-chain `balance`; buys still in flight stay deducted."""
+        self.wallet = balance - self.in_flight
+
+    def reserve(self, state, usd, lamports=0):
+        """
+        Claim a position worth `usd` that spends `lamports` for `state`, or
+        False if a cap or the spendable wallet balance would be exceeded.
+        """
+        if (
+            self.positions >= self.max_positions
+            or self.exposure + usd > self.max_exposure
+            or self.wallet is not None and lamports >= self.wallet
+        ):
+            self.rejected += 1
+            return False
+        self.positions += 1
+        self.exposure += usd
+        state.exposure = usd
+        state.lamports = lamports
+        self.in_flight += lamports
+        if self.wallet is not None:
+            self.wallet -= lamports
+        return True
+
+    def settle(self, state, spent):
+        """The buy of `state` finished; its lamports are returned to the wallet unless `spent`."""
+        self.in_flight -= state.lamports
+        if not spent and self.wallet is not None:
+            self.wallet += state.lamports
+        state.lamports = 0
+
+    def release(self, state):
+        if state.lamports:
+            self.settle(state, spent=False)
+        if state.exposure:
+            self.positions -= 1
+            self.exposure -= state.exposure
+            state.exposure = 0.0
+
+    def wake_all(self):
+        for state in self.sessions.values():
+            state.changed.set()
+
+    async def report(self, stop_event, interval=LOG_STATS_INTERVAL):
+        while not stop_event.is_set():
+            await asyncio.sleep(interval)
+            logging.info(
+                f"{cc.LIGHT_GRAY}Sessions: active={len(self.sessions)}/{self.max_sessions} pending={len(self.pending)} opened={self.opened} "
+                f"positions={self.positions}/{self.max_positions} holding={len(self.holding)} exposure=${self.exposure:.2f}/${self.max_exposure:.2f} "
+                f"rejected_buys={self.rejected}{cc.RESET}"
+            )
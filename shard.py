@@ -0,0 +1,343 @@
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import os
+import sys
+import time
+import zlib
+
+try:
+    from .rayozaur import *
+    from .cache import MetadataCache
+    from .spl import TOKEN_ACCOUNT, TOKEN_ACCOUNT_SIZE
+except ImportError:
+    from rayozaur import *
+    from cache import MetadataCache
+    from spl import TOKEN_ACCOUNT, TOKEN_ACCOUNT_SIZE
+
+
+def shard_of(mint, shards):
+    """Worker index owning `mint`; stable across processes and runs."""
+    return zlib.crc32(mint.encode()) % shards
+
+
+def share_budget(limiter, share):
+    """Give this process the `share` (0..1] fraction of the provider's request budget."""
+    limiter.rate = RATE_LIMIT_RPS * share
+    limiter.burst = max(1, int(RATE_LIMIT_BURST * share))
+    limiter.tokens = float(limiter.burst)
+
+
+def worker_share(shards):
+    """Budget fraction of each worker: what the coordinator leaves, split evenly."""
+    return (1 - SHARD_COORDINATOR_SHARE) / shards
+
+
+class ShardWorker(DexBetterLogs):
+    """
+    One shard of the sharded mode: tracks the mints hashed to it on its own
+    event loop, with its own account subscriptions, RPC connections and
+    session engine. Buys and sells are forwarded to the coordinator, which
+    owns the wallet and the global position caps, and creators it
+    blacklists are pushed to every shard.
+    """
+
+    def __init__(self, index, shards, conn):
+        super().__init__(WS_URL)
+        self.index = index
+        self.conn = conn
+        self.cache = MetadataCache(None)  # The coordinator persists the shared cache
+        self.creators = self.cache.creators
+        self.price_feed_mode = "accounts"
+        self.request_ids = itertools.count(1)
+        self.requests = {}  # {request id: future}
+        share_budget(self.limiter, worker_share(shards))
+
+    def on_message(self):
+        try:
+            message = self.conn.recv()
+        except (EOFError, OSError):
+            message = None
+        if message is None:
+            asyncio.get_running_loop().remove_reader(self.conn.fileno())
+            self.stop_event.set()
+            self.engine.wake_all()
+            return
+        kind = message[0]
+        if kind == "reply":
+            future = self.requests.get(message[1])
+            if future is not None and not future.done():
+                future.set_result(message[2])
+        elif kind == "track":
+            _, mint, pool1, pool2, creator = message
+            if creator:
+                self.creators[mint] = creator
+            self.pools.setdefault(mint, {"pool1": pool1, "pool2": pool2, "sold": False})
+            asyncio.create_task(self.manage_subscriptions(pool1, pool2, mint))
+        elif kind == "blacklist":
+            self.blacklist.add(message[1])
+        elif kind == "release":
+            mint = message[1]
+            self.pools.setdefault(mint, {"pool1": None, "pool2": None, "sold": False})["sold"] = True
+            asyncio.create_task(self.release_pools(mint))
+
+    async def request(self, kind, *args):
+        """Run `kind` on the coordinator and wait for its result."""
+        request_id = next(self.request_ids)
+        future = self.requests[request_id] = asyncio.get_running_loop().create_future()
+        self.conn.send((kind, request_id, *args))
+        try:
+            return await future
+        finally:
+            self.requests.pop(request_id, None)
+
+    async def start_session(self, state):
+        self.conn.send(("opened", state.mint))
+        await super().start_session(state)
+
+    async def open_position(self, state):
+        return await self.request("open", state.mint)
+
+    async def sell(self, lp_id, amount, our_change_pct):
+        return await self.request("sell", lp_id, amount, our_change_pct)
+
+    async def release_pools(self, mint):
+        await super().release_pools(mint)
+        self.conn.send(("closed", mint))
+
+    async def run(self):
+        self.load_blacklist()
+        self.swaps = SolanaSwaps(
+            self,
+            None,  # Read-only: transactions are signed by the coordinator
+            WALLET,
+            RPC_URL,
+            API_KEY,
+            rpc=self.rpc,
+            retries=self.retries,
+            cache=self.cache,
+            limiter=self.limiter,
+            session=self.session,
+        )
+        await self.account_pool.start()
+        asyncio.get_running_loop().add_reader(self.conn.fileno(), self.on_message)
+        logging.info(f"{cc.LIGHT_BLUE}Shard {self.index} ready (pid {os.getpid()}){cc.RESET}")
+        report = asyncio.create_task(self.engine.report(self.stop_event))
+        await self.stop_event.wait()
+        report.cancel()
+
+
+async def _run_worker(index, shards, conn):
+    worker = ShardWorker(index, shards, conn)
+    try:
+        await worker.run()
+    finally:
+        await worker.shutdown()
+
+
+def run_worker(index, shards, conn):
+    try:
+        asyncio.run(_run_worker(index, shards, conn))
+    except KeyboardInterrupt:
+        pass
+
+
+class ShardCoordinator(DexBetterLogs):
+    """
+    Detection and wallet process of the sharded mode.
+
+    New pools are not priced here: each one is handed to worker
+    `shard_of(mint)`, a separate process with its own event loop and account
+    subscriptions, so JSON decoding, pricing and strategy evaluation spread
+    over the cores. Workers report when sessions open and close, which keeps
+    the MAX_SESSIONS gate global, and forward their buys and sells, which run
+    here against the wallet and the global position/exposure caps; creators
+    blacklisted by a sell are broadcast to every worker. Messages travel over
+    one pipe per worker, read through the event loop. Detection and
+    execution traffic all leave from here, so the coordinator keeps
+    SHARD_COORDINATOR_SHARE of the rate budget and the workers split the rest.
+
+    Pools are priced from vault subscriptions ("accounts") in this mode, not
+    from the swap logs feed. The feed matches AMM v4 swap records to pools
+    by their reserves across all tracked pools, so it needs every frame of
+    the logs stream in one process: on the coordinator it would price every
+    session there, and per shard it would need every swap frame copied to
+    every worker. Vault subscriptions are opened by the owning worker, so
+    the decoding stays spread over the shards.
+    """
+
+    def __init__(self, rpc_endpoint, workers=SHARD_WORKERS):
+        super().__init__(rpc_endpoint)
+        self.price_feed_mode = "accounts"
+        self.shards = workers or max(1, (os.cpu_count() or 2) - 1)
+        context = multiprocessing.get_context("spawn")
+        self.conns, self.workers, self.worker_conns = [], [], []
+        for index in range(self.shards):
+            conn, worker_conn = context.Pipe()
+            self.conns.append(conn)
+            self.worker_conns.append(worker_conn)
+            self.workers.append(context.Process(target=run_worker, args=(index, self.shards, worker_conn), name=f"shard-{index}", daemon=True))
+        self.assigned = {}  # {mint: shard}
+        share_budget(self.limiter, SHARD_COORDINATOR_SHARE)
+
+    async def manage_subscriptions(self, pool1, pool2, mint):
+        """Hand the pool to its shard; `mint` may still be a future."""
+        if asyncio.isfuture(mint):
+            asyncio.create_task(self.assign(pool1, pool2, mint))
+        else:
+            await self.assign(pool1, pool2, mint)
+
+    async def assign(self, pool1, pool2, mint):
+        if asyncio.isfuture(mint):
+            mint = await mint
+        if mint is None or mint in self.assigned:
+            return
+        shard = self.assigned[mint] = shard_of(mint, self.shards)
+        self.conns[shard].send(("track", mint, pool1, pool2, self.creators.get(mint)))
+        logging.info(f"Assigned {mint} to shard {shard}")
+
+    def blacklist_creator(self, creator):
+        known = creator in self.blacklist
+        super().blacklist_creator(creator)
+        if known:
+            return
+        for conn in self.conns:
+            try:
+                conn.send(("blacklist", creator))
+            except OSError:
+                pass
+
+    async def release_pools(self, mint):
+        await super().release_pools(mint)
+        shard = self.assigned.pop(mint, None)
+        if shard is not None:
+            self.conns[shard].send(("release", mint))
+
+    def on_message(self, shard):
+        try:
+            message = self.conns[shard].recv()
+        except (EOFError, OSError):
+            self.on_worker_exit(shard)
+            return
+        kind = message[0]
+        if kind == "opened":
+            self.engine.open(message[1], 0, time.time())  # Only counted against the caps here
+        elif kind == "closed":
+            self.engine.close(message[1])
+            self.assigned.pop(message[1], None)
+        else:
+            asyncio.create_task(self.serve_request(shard, *message))
+
+    async def serve_request(self, shard, kind, request_id, mint, *args):
+        result = None
+        try:
+            if kind == "open":
+                state = self.engine.get(mint)
+                result = await self.open_position(state) if state is not None else "PositionCapped"
+            elif kind == "sell":
+                result = await self.sell(mint, *args)
+        except Exception as e:
+            logging.error(f"Shard {shard} {kind} request for {mint} failed: {e}")
+        try:
+            self.conns[shard].send(("reply", request_id, result))
+        except OSError:
+            pass
+
+    def on_worker_exit(self, shard):
+        asyncio.get_running_loop().remove_reader(self.conns[shard].fileno())
+        logging.error(f"Shard {shard} exited, dropping its sessions")
+        for mint, owner in list(self.assigned.items()):
+            if owner == shard:
+                del self.assigned[mint]
+                self.engine.close(mint)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        for shard, (worker, worker_conn) in enumerate(zip(self.workers, self.worker_conns)):
+            worker.start()
+            worker_conn.close()
+            loop.add_reader(self.conns[shard].fileno(), self.on_message, shard)
+        logging.info(f"{cc.LIGHT_BLUE}Started {self.shards} shard workers, pricing from vault subscriptions{cc.RESET}")
+        await super().run()
+
+    async def shutdown(self):
+        loop = asyncio.get_running_loop()
+        for conn in self.conns:
+            try:
+                loop.remove_reader(conn.fileno())
+                conn.send(None)
+            except OSError:
+                pass
+        for worker in self.workers:
+            if worker.is_alive():
+                await loop.run_in_executor(None, worker.join, 5)
+        await super().shutdown()
+
+
+async def main():
+    coordinator = ShardCoordinator(WS_URL)
+    try:
+        await coordinator.run()
+    except KeyboardInterrupt:
+        await coordinator.shutdown()
+
+
+def _bench_worker(index, shards, mints, updates, conn):
+    """Synthetic shard load: decode base64 vault notifications of the owned mints and tick their sessions."""
+    import base64
+
+    engine, scale, sol_reserve = SessionEngine(max_sessions=mints), price_scale(6), 79_005_078_224
+    owned = [f"mint{i}" for i in range(mints) if shard_of(f"mint{i}", shards) == index]
+    frames = []
+    for step in range(64):
+        raw = TOKEN_ACCOUNT.pack(bytes(32), bytes(32), 206_900_000_123_456 - step * 10 ** 9)
+        data = base64.b64encode(raw + bytes(TOKEN_ACCOUNT_SIZE - len(raw))).decode()
+        frames.append(json.dumps({"jsonrpc": "2.0", "method": "accountNotification", "params": {
+            "subscription": 1, "result": {"context": {"slot": 1}, "value": {"lamports": 2039280, "data": [data, "base64"]}}}}))
+    for mint in owned:
+        engine.open(mint, 1, 0.0)
+    conn.send(len(owned))
+    conn.recv()  # Start signal
+    count = 0
+    for update in range(updates):
+        frame = frames[update % len(frames)]
+        for mint in owned:
+            value = json.loads(frame)["params"]["result"]["value"]
+            _, _, amount = decode_token_account(value["data"][0])
+            engine.get(mint).tick(reserve_price(sol_reserve, amount, scale), update * 0.1)
+            count += 1
+    conn.send(count)
+
+
+def benchmark(mints=200, updates=200):
+    """Aggregate notification throughput of 1..cpu_count() worker processes over the same mints."""
+    context = multiprocessing.get_context("spawn")
+    counts = sorted({1, 2, 4, os.cpu_count() or 1})
+    print(f"{mints} mints x {updates} updates on {os.cpu_count()} cores")
+    if (os.cpu_count() or 1) < 2:
+        print("Single core: this only measures the partitioning overhead, not scaling")
+    baseline = None
+    for shards in counts:
+        pipes = [context.Pipe() for _ in range(shards)]
+        workers = [context.Process(target=_bench_worker, args=(index, shards, mints, updates, child)) for index, (_, child) in enumerate(pipes)]
+        for worker in workers:
+            worker.start()
+        owned = [parent.recv() for parent, _ in pipes]  # Every worker has built its frames and sessions
+        started = time.perf_counter()
+        for parent, _ in pipes:
+            parent.send(True)
+        total = sum(parent.recv() for parent, _ in pipes)
+        elapsed = time.perf_counter() - started
+        for worker in workers:
+            worker.join()
+        rate = total / elapsed
+        baseline = baseline or rate
+        print(f"{shards:>3} workers (mints per worker {min(owned)}-{max(owned)}): {rate:10,.0f} updates/s, x{rate / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        benchmark()
+    else:
+        asyncio.run(main())
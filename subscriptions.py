@@ -0,0 +1,271 @@
+import asyncio
+import itertools
+import json
+import logging
+
+import websockets
+from websockets.protocol import State
+
+try:
+    from .common_ import *
+    from .colors import *
+except ImportError:
+    from common_ import *
+    from colors import *
+
+
+class _PooledConnection:
+    """One long-lived websocket carrying many account subscriptions."""
+
+    def __init__(self, index):
+        self.index = index
+        self.ws = None
+        self.ready = asyncio.Event()
+        self.slots = asyncio.Semaphore(SUBSCRIBE_CONCURRENCY)  # accountSubscribe round trips in flight
+        self.pending = {}       # {request id: (address, future)}
+        self.sub_ids = {}       # {subscription id: address}
+        self.addresses = {}     # {address: subscription id}
+
+    @property
+    def live(self):
+        return self.ready.is_set() and self.ws is not None and self.ws.state is State.OPEN
+
+    @property
+    def load(self):
+        return len(self.addresses) + len(self.pending)
+
+    def reset(self):
+        self.ws = None
+        self.ready.clear()
+        for _, future in self.pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("connection dropped"))
+        self.pending.clear()
+        self.sub_ids.clear()
+        orphans = list(self.addresses)
+        self.addresses.clear()
+        return orphans
+
+
+class AccountSubscriptionPool:
+    """
+    Multiplexes accountSubscribe requests over a small set of shared websockets.
+
+    Notifications are routed by subscription id to the handler registered for
+    the address. Each address gets its own queue so updates are handled in
+    order without one slow handler blocking the rest of the connection.
+    When a connection drops, its addresses are moved to the least loaded
+    live connection and the dropped one reconnects in the background; the
+    moved addresses are re-subscribed concurrently, at most
+    SUBSCRIBE_CONCURRENCY in flight per connection. A failed subscribe is
+    retried on the least loaded live connection with capped exponential
+    backoff, and abandoned after `SUBSCRIBE_ATTEMPTS`. A subscription
+    confirmed after its request timed out or its address was unsubscribed is
+    unsubscribed again, so it does not stay open on the server.
+    """
+
+    def __init__(self, ws_url=WS_URL, size=ACCOUNT_WS_CONNECTIONS, stop_event=None, params=None):
+        self.ws_url = ws_url
+        self.size = max(1, size)
+        self.stop_event = stop_event or asyncio.Event()
+        self.params = params or {"encoding": "jsonParsed", "commitment": "processed"}
+        self.connections = [_PooledConnection(i) for i in range(self.size)]
+        self.handlers = {}      # {address: handler coroutine function}
+        self.queues = {}        # {address: asyncio.Queue}
+        self.consumers = {}     # {address: asyncio.Task}
+        self.tasks = set()
+        self.request_ids = itertools.count(1)
+
+    async def start(self):
+        """Open all pooled connections."""
+        for conn in self.connections:
+            task = asyncio.create_task(self._connection_loop(conn))
+            self.tasks.add(task)
+
+    async def subscribe(self, address, handler):
+        """Subscribe `address` and route its notifications to `handler(data)`."""
+        if address in self.handlers:
+            return
+        self.handlers[address] = handler
+        self.queues[address] = asyncio.Queue()
+        self.consumers[address] = asyncio.create_task(self._consume(address))
+        return await self._subscribe(address)
+
+    async def unsubscribe(self, address):
+        """Send accountUnsubscribe for `address` and stop its handler."""
+        self.handlers.pop(address, None)
+        self.queues.pop(address, None)
+        consumer = self.consumers.pop(address, None)
+        if consumer and consumer is not asyncio.current_task():
+            consumer.cancel()
+
+        for conn in self.connections:
+            sub_id = conn.addresses.pop(address, None)
+            if sub_id is None:
+                continue
+            conn.sub_ids.pop(sub_id, None)
+            if await self._unsubscribe_on(conn, sub_id, address):
+                logging.info(f"Unsubscribed from account {address}")
+
+    async def _unsubscribe_on(self, conn, sub_id, address):
+        if conn.ws is None:
+            return False
+        try:
+            await conn.ws.send(json.dumps({
+                "jsonrpc": "2.0",
+                "method": "accountUnsubscribe",
+                "params": [sub_id],
+                "id": next(self.request_ids),
+            }))
+            return True
+        except Exception as e:
+            logging.error(f"Error unsubscribing from {address}: {e}")
+            return False
+
+    def __contains__(self, address):
+        return address in self.handlers
+
+    def stats(self):
+        return {conn.index: conn.load for conn in self.connections}
+
+    async def close(self):
+        for address in list(self.handlers):
+            await self.unsubscribe(address)
+        for task in self.tasks:
+            task.cancel()
+        for conn in self.connections:
+            if conn.ws is not None:
+                await conn.ws.close()
+
+    async def _least_loaded(self):
+        """The least loaded live connection, waiting for one to open; None once the pool is stopping."""
+        while not self.stop_event.is_set():
+            live = [conn for conn in self.connections if conn.live]
+            if live:
+                return min(live, key=lambda conn: conn.load)
+            waiters = [asyncio.create_task(conn.ready.wait()) for conn in self.connections]
+            waiters.append(asyncio.create_task(self.stop_event.wait()))
+            try:
+                await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for waiter in waiters:
+                    waiter.cancel()
+
+    async def _subscribe(self, address):
+        """Subscribe `address` on the least loaded live connection; False once it is given up."""
+        delay = SUBSCRIBE_BASE_DELAY
+        for attempt in range(1, SUBSCRIBE_ATTEMPTS + 1):
+            if address not in self.handlers or self.stop_event.is_set():
+                return False
+            conn = await self._least_loaded()
+            if conn is None:
+                return False
+            error = await self._subscribe_on(conn, address)
+            if error is None:
+                return True
+            if attempt < SUBSCRIBE_ATTEMPTS:
+                logging.warning(
+                    f"Subscription for {address} failed on connection {conn.index} "
+                    f"(attempt {attempt}/{SUBSCRIBE_ATTEMPTS}): {error}. Retrying in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, SUBSCRIBE_MAX_DELAY)
+        if address in self.handlers:
+            logging.error(f"Giving up subscription for {address} after {SUBSCRIBE_ATTEMPTS} attempts")
+            await self.unsubscribe(address)
+        return False
+
+    async def _subscribe_on(self, conn, address):
+        """
+        One accountSubscribe attempt on `conn`; returns the error, or None on success.
+        A request that timed out stays pending, so a late confirmation can be unsubscribed.
+        """
+        request_id = next(self.request_ids)
+        future = asyncio.get_running_loop().create_future()
+        conn.pending[request_id] = (address, future)  # Counted in the load before waiting for a slot
+        sent = False
+        try:
+            async with conn.slots:
+                if future.done():  # The connection dropped meanwhile
+                    return future.exception()
+                await conn.ws.send(json.dumps({
+                    "jsonrpc": "2.0",
+                    "method": "accountSubscribe",
+                    "params": [address, self.params],
+                    "id": request_id,
+                }))
+                sent = True
+                sub_id = await asyncio.wait_for(future, timeout=15)
+            logging.info(f"Subscribed to account {address} on connection {conn.index} (sub {sub_id})")
+            return None
+        except Exception as e:
+            if not sent:
+                conn.pending.pop(request_id, None)
+            return e
+
+    async def _rebalance(self, orphans):
+        await asyncio.gather(*(self._subscribe(address) for address in orphans if address in self.handlers))
+
+    async def _connection_loop(self, conn):
+        while not self.stop_event.is_set():
+            try:
+                async with websockets.connect(self.ws_url, ping_interval=15, ping_timeout=60, max_size=10**6) as ws:
+                    conn.ws = ws
+                    conn.ready.set()
+                    logging.info(f"Account connection {conn.index} opened")
+                    async for message in ws:
+                        try:
+                            self._route(conn, json.loads(message))
+                        except Exception as e:
+                            logging.warning(f"Skipping bad frame on account connection {conn.index}: {e}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.warning(f"Account connection {conn.index} dropped: {e}")
+
+            orphans = conn.reset()
+            if orphans:
+                logging.info(f"Rebalancing {len(orphans)} subscriptions from connection {conn.index}")
+                task = asyncio.create_task(self._rebalance(orphans))
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+            await asyncio.sleep(1)
+
+    def _route(self, conn, data):
+        if data.get("method") == "accountNotification":
+            address = conn.sub_ids.get(data.get("params", {}).get("subscription"))
+            queue = self.queues.get(address)
+            if queue is not None:
+                queue.put_nowait(data)
+            return
+
+        pending = conn.pending.pop(data.get("id"), None)
+        if pending is None:
+            return
+        address, future = pending
+        if "result" not in data:
+            if not future.done():
+                future.set_exception(RuntimeError(f"Unexpected response: {data}"))
+            return
+        sub_id = data["result"]
+        if future.done() or address not in self.handlers:
+            # Timed out or unsubscribed while in flight: nobody owns this subscription
+            task = asyncio.create_task(self._unsubscribe_on(conn, sub_id, address))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+            return
+        conn.sub_ids[sub_id] = address
+        conn.addresses[address] = sub_id
+        future.set_result(sub_id)
+
+    async def _consume(self, address):
+        queue = self.queues[address]
+        while address in self.handlers and not self.stop_event.is_set():
+            data = await queue.get()
+            handler = self.handlers.get(address)
+            if handler is None:
+                break
+            try:
+                await handler(data)
+            except Exception as e:
+                logging.error(f"Error in account handler for {address}: {e}")
@@ -3,12 +3,10 @@ import aiohttp
 import base58
 import base64
 import json
-from typing import Optional
+from typing import Optional, Union
 from solders.keypair import Keypair # lint: ignore
 from solders.transaction import VersionedTransaction # lint: ignore
 from solders import message
-from solana.rpc.async_api import AsyncClient
-from solana.rpc.types import TxOpts
 import time, logging, os, sys
 from decimal import Decimal
 import websockets, requests
@@ -17,10 +15,18 @@ import websockets.connection
 try:
     from .common_ import *
     from .colors import *
+    from .rpc import RpcBatcher
+    from .retry import RetryScheduler
+    from .cache import MetadataCache
+    from .limiter import PriorityRateLimiter, EXECUTION, ANALYTICS
 
 except ImportError:
     from common_ import *
     from colors import *
+    from rpc import RpcBatcher
+    from retry import RetryScheduler
+    from cache import MetadataCache
+    from limiter import PriorityRateLimiter, EXECUTION, ANALYTICS
 
 LOG_DIR = 'dev/logs'
 # Configure logging
@@ -43,14 +49,17 @@ def get_solana_price_usd():
         return '247.11'  # Fallback price
 
 class SolanaSwaps:
-    def __init__(self, parent, private_key: Keypair, wallet_address: str, rpc_endpoint: str, api_key: str):
+    def __init__(self, parent, private_key: Keypair, wallet_address: str, rpc_endpoint: str, api_key: str, rpc: Optional[RpcBatcher] = None, retries: Optional[RetryScheduler] = None, cache: Optional[MetadataCache] = None, limiter: Optional[PriorityRateLimiter] = None, session: Optional[aiohttp.ClientSession] = None):
         self.rpc_endpoint = rpc_endpoint
         self.wallet_address = wallet_address
         self.private_key = private_key
         self.api_key = api_key
         self.q_retry = 0
-        self.session = aiohttp.ClientSession()  # Persistent session
-        self.async_client = AsyncClient(endpoint=self.rpc_endpoint)
+        self.session = session or aiohttp.ClientSession()  # Persistent session, shared with the parent's pools when given
+        self.limiter = limiter or PriorityRateLimiter()  # Shared outbound rate limiter
+        self.rpc = rpc or RpcBatcher(self.session, self.rpc_endpoint, limiter=self.limiter)  # Shared JSON-RPC batcher
+        self.retries = retries or RetryScheduler()
+        self.cache = cache or MetadataCache(None)
         self.dexter = parent
         self.sol_price_usd = Decimal(get_solana_price_usd())
         self.ws_url = QN_WS
@@ -73,43 +82,28 @@ class SolanaSwaps:
             self.websocket_conn = None
 
     async def fetch_wallet_balance_sol(self):
-        headers = {"Content-Type": "application/json"}
-        payload = {"jsonrpc": "2.0", "id": 1, "method": "getBalance",
-            "params": [
-                f"{WALLET}",
-            ]
-        }
-        async with self.session.post(RPC_URL, json=payload, headers=headers) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                result = data.get('result')
-                value = result.get('value')
-                logging.info(f"{cc.BRIGHT}{cc.LIGHT_GREEN}| Wallet balance: {Decimal(value) / Decimal('1e9')} SOL")
-                return value
-            else:
-                raise Exception(f"HTTP {resp.status}: {await resp.text()}")
+        data = await self.rpc.call("getBalance", [f"{WALLET}"], EXECUTION)
+        if "error" in data:
+            raise Exception(f"RPC error: {data['error']}")
+        result = data.get('result')
+        value = result.get('value')
+        logging.info(f"{cc.BRIGHT}{cc.LIGHT_GREEN}| Wallet balance: {Decimal(value) / Decimal('1e9')} SOL")
+        return value
 
     async def get_token_supply(self, mint):
         try:
-            headers = {"Content-Type": "application/json"}
-            payload = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "getTokenSupply",
-                "params": [
-                    mint
-                ]
-            }
-            async with self.session.get(RPC_URL, json=payload, headers=headers) as response:
-                supply = 0
-                response.raise_for_status()
-                data = await response.json()
-                supply = data.get("result", {}).get("value")
-                if supply:
-                    amount = int(supply.get("amount"))
-                    decimals = int(supply.get("decimals"))
-                supply = amount / 10 ** decimals
-                return supply
+            cached = self.cache.supply.get(mint)
+            if cached is not None:
+                return cached["amount"] / 10 ** cached["decimals"]
+            data = await self.rpc.call("getTokenSupply", [mint], ANALYTICS)
+            supply = data.get("result", {}).get("value")
+            if supply:
+                amount = int(supply.get("amount"))
+                decimals = int(supply.get("decimals"))
+                self.cache.supply[mint] = {"amount": amount, "decimals": decimals}
+                self.cache.decimals[mint] = decimals
+            supply = amount / 10 ** decimals
+            return supply
         except Exception as e:
             logging.error(f"Failed to get token supply: {e}")
             return None
@@ -174,6 +168,7 @@ class SolanaSwaps:
                         }, 
                     "id": 1
                 }
+                await self.limiter.acquire(EXECUTION)
                 await self.websocket_conn.send(json.dumps(quote_req))
 
             await token_quote()
@@ -209,6 +204,7 @@ class SolanaSwaps:
                 },
                 "id": 2
             }
+            await self.limiter.acquire(EXECUTION)
             await self.websocket_conn.send(json.dumps(swap_req))
 
             async for msg in self.websocket_conn:
@@ -242,8 +238,9 @@ class SolanaSwaps:
 
         # Step 6: Send the signed transaction with preflight checks
         try:
-            opts = TxOpts(skip_preflight=True, max_retries=0, skip_confirmation=True)
-            result = await self.async_client.send_raw_transaction(txn=bytes(signed_txn), opts=opts)
+            encoded = base64.b64encode(bytes(signed_txn)).decode("ascii")
+            opts = {"encoding": "base64", "skipPreflight": True, "maxRetries": 0}
+            result = await self.rpc.call("sendTransaction", [encoded, opts], EXECUTION)
             logging.info("Transaction sent successfully.")
         except Exception as e:
             logging.error(f"Error sending transaction: {e}")
@@ -251,8 +248,9 @@ class SolanaSwaps:
 
         # Step 7: Extract and return the transaction ID
         try:
-            result_json = result.to_json()
-            transaction_id = json.loads(result_json).get('result')
+            if "error" in result:
+                logging.error(f"sendTransaction error: {result['error']}")
+            transaction_id = result.get('result')
             elapsed_time = time.time() - start_time
             logging.info(f"Transaction time: {elapsed_time:.2f} seconds")
             if not transaction_id:
@@ -264,86 +262,60 @@ class SolanaSwaps:
             logging.error(f"Error parsing transaction result: {e}")
             raise Exception("Failed to parse transaction result.") from e
 
-    async def get_swap_tx(self, tx_id: str, mint_token: str, tx_type: str = "buy", max_retries: int = 8) -> Optional[str]:
+    async def get_swap_tx(self, tx_id: str, mint_token: str, tx_type: str = "buy", deadline: float = SWAP_CONFIRM_DEADLINE) -> Union[dict, str]:
         """
-        Fetches the transaction details for a given transaction ID with retry mechanism.
+        Fetches the transaction details for a given transaction ID, polling with backoff.
 
         Args:
             tx_id (str): The transaction signature.
             mint_token (str): The mint address of the token.
             tx_type (str): Type of transaction ("buy" or "sell").
-            max_retries (int): Maximum number of retries if the result is None.
-            retry_interval (float): Time to wait between retries in seconds.
+            deadline (float): Seconds to keep polling before giving up.
 
         Returns:
-            Optional[str]: The token balance if successful, else None.
+            {"balance": amount} if confirmed (token amount for buys, wallet lamports for sells),
+            "InstructionError" if the transaction failed on chain, or "tx_fail" if it was
+            not found within the deadline and may still land.
         """
-        attempt = 0
-        while attempt < max_retries:
-            try:
-                await asyncio.sleep(1)  # Initial delay before first attempt
-                payload = {
-                    "jsonrpc": "2.0",
-                    "id": 1,
-                    "method": "getTransaction",
-                    "params": [
-                        tx_id,
-                        {
-                            "commitment": "confirmed",
-                            "encoding": "json",
-                            "maxSupportedTransactionVersion": 0
-                        }
-                    ]
-                }
-                headers = {
-                    "Content-Type": "application/json"
+        async def attempt():
+            data = await self.rpc.call("getTransaction", [
+                tx_id,
+                {
+                    "commitment": "confirmed",
+                    "encoding": "json",
+                    "maxSupportedTransactionVersion": 0
                 }
+            ], EXECUTION)
+            logging.debug(f"Received data: {data}")
 
-                async with self.session.post(RPC_URL, json=payload, headers=headers, timeout=10) as response:
-                    if response.status != 200:
-                        logging.error(f"HTTP Error {response.status}: {await response.text()}")
-                        raise Exception(f"HTTP Error {response.status}")
-    
-                    data = await response.json()
-                    logging.debug(f"Attempt {attempt + 1}: Received data: {data}")
+            if not data or data.get('result') is None:
+                return None
+            result = data['result']
+            meta = result.get("meta", {})
+            err = meta.get("err")
+            if err is not None:
+                logging.info(f"{cc.RED}Instruction error occurred: {err}")
+                return "InstructionError"
 
-                    if data and data.get('result') is not None:
-                        result = data['result']
-                        meta = result.get("meta", {})
-                        err = meta.get("err", {})
-                        if err is not None and err.get("InstructionError"):
-                            logging.info(f"{cc.RED}Instruction error occurred: {err}")
-                            await asyncio.sleep(0.2)
-                            return "InstructionError"
-                        
-                        post_token_balances = meta.get("postTokenBalances", [])
-                        post_balances = meta.get("postBalances", [])
+            post_token_balances = meta.get("postTokenBalances", [])
+            post_balances = meta.get("postBalances", [])
 
-                        if tx_type == "buy":
-                            for post_token_balance in post_token_balances:
-                                if post_token_balance.get("mint") == mint_token:
-                                    if post_token_balance.get('owner') == self.wallet_address:
-                                        logging.info("Transaction verified.")
-                                        token_balance = post_token_balance.get("uiTokenAmount", {}).get("amount")
-                                        return {"balance": int(token_balance)}
-                        elif tx_type == "sell":
-                            if post_balances:
-                                sol_balance = post_balances[0]  # Assuming the first element is SOL
-                                return {"balance": int(sol_balance)}
-                            else:
-                                logging.error("No post balances found for sell transaction.")
-                                return None
-                    else:
-                        logging.warning(f"Attempt {attempt + 1}: Transaction result is None.")
-            except Exception as e:
-                logging.warning(f"Attempt {attempt + 1}: Exception occurred: {e}")
+            if tx_type == "buy":
+                for post_token_balance in post_token_balances:
+                    if post_token_balance.get("mint") == mint_token:
+                        if post_token_balance.get('owner') == self.wallet_address:
+                            logging.info("Transaction verified.")
+                            token_balance = post_token_balance.get("uiTokenAmount", {}).get("amount")
+                            return {"balance": int(token_balance)}
+            elif tx_type == "sell":
+                if post_balances:
+                    sol_balance = post_balances[0]  # Assuming the first element is SOL
+                    return {"balance": int(sol_balance)}
+                logging.error("No post balances found for sell transaction.")
+            return None
 
-            # Increment the attempt counter
-            attempt += 1
-            if attempt < max_retries:
-                logging.info(f"Retrying in 1 seconds...")
-                await asyncio.sleep(0.5)
-            else:
-                logging.error(f"Max retries reached for transaction ID: {tx_id}. Transaction details not found.")
-                return "tx_fail"
-        return None
\ No newline at end of file
+        result = await self.retries.run("getTransaction:swap", attempt, deadline)
+        if result is None:
+            logging.error(f"Transaction details for {tx_id} not found within {deadline}s.")
+            return "tx_fail"
+        return result